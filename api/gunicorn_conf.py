@@ -0,0 +1,13 @@
+# Gunicorn settings for running the API as a long-lived container service.
+# Lambda deploys keep using `handler = Mangum(app)` and ignore this file.
+#
+# Note: the all-time cache in index.py is per process, so each worker pays
+# its own first fill after startup.
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+keepalive = 5
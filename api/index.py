@@ -1,15 +1,18 @@
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from threading import Lock
-from typing import Any, Dict, Optional
+from typing import Any, Iterable, Iterator, Optional, Tuple
 from data.database import DataBase
 from mangum import Mangum
 import uvicorn
 import logging
+import gzip
 import hashlib
+import orjson
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
@@ -17,12 +20,20 @@ logger = logging.getLogger()
 
 load_dotenv()
 db = DataBase()
-app = FastAPI()
+
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Simple in-memory cache for expensive queries. This keeps a warmed result in
-# memory for a period to speed up first paint for new users.
-cache_lock = Lock()
-cached_all_time: Dict[str, Optional[Any]] = {"data": None, "fetched_at": None}
+# memory for a period to speed up first paint for new users. The body is kept
+# already JSON-encoded so cache hits skip serialization entirely.
+# A gzipped copy is kept too, so compression is paid once per cache cycle.
+# (body, gzipped, fetched_at) is published as a single tuple so readers never
+# need a lock; refresh_lock only makes sure one thread at a time runs the
+# full query.
+cached_all_time: Tuple[Optional[bytes], Optional[bytes], Optional[datetime]] = (None, None, None)
+refresh_lock = Lock()
+REFRESH_WAIT_SECONDS = 30
 CACHE_TTL_HOURS = 12
 DEFAULT_CACHE_TTL_SECONDS = 300
 
@@ -37,7 +48,15 @@ def cached_json_response(
     cache_seconds: int,
     etag_seed: Optional[str] = None,
     request: Optional[Request] = None,
+    gzipped: Optional[bytes] = None,
 ):
+    """
+    `payload` may be JSON-able data, pre-encoded bytes, or a zero-arg
+    callable producing one of those. The callable is only invoked when the
+    client's ETag doesn't already match.
+    `gzipped` is an optional precompressed copy of a bytes payload, sent to
+    clients that accept gzip.
+    """
     etag_value = build_etag(etag_seed) if etag_seed else None
     headers = {
         "Cache-Control": f"public, max-age={cache_seconds}, s-maxage={cache_seconds}",
@@ -50,29 +69,119 @@ def cached_json_response(
         if if_none_match and if_none_match == etag_value:
             return Response(status_code=304, headers=headers)
 
-    return JSONResponse(content=payload, headers=headers)
+    if gzipped is not None and request and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        return Response(content=gzipped, media_type="application/json", headers=headers)
+    if callable(payload):
+        payload = payload()
+    if isinstance(payload, bytes):
+        return Response(content=payload, media_type="application/json", headers=headers)
+    return ORJSONResponse(content=payload, headers=headers)
 
 
-def get_cached_all_time_stocked_lakes(force_refresh: bool = False):
-    now = datetime.now()
+class _JsonArrayStream:
+    """
+    Byte iterator over `chunks` encoded as one JSON array. close() also
+    closes `chunks` (if it can be closed), even before iteration started.
+    """
 
-    with cache_lock:
-        data = cached_all_time.get("data")
-        fetched_at = cached_all_time.get("fetched_at")
-        is_fresh = fetched_at and (now - fetched_at) < timedelta(hours=CACHE_TTL_HOURS)
-        if data is not None and is_fresh and not force_refresh:
-            return data
+    def __init__(self, chunks: Iterable[list]):
+        self._chunks = chunks
+        self._encoded = self._encode()
+        # StreamingResponse pulls chunks on worker threads; close() waits for
+        # an in-flight pull instead of closing the source under it.
+        self._lock = Lock()
 
-    # Cache miss or stale; fetch and store.
-    start_date = datetime(2000, 1, 1)
-    end_date = now
-    stocked_lakes = db.get_stocked_lakes_data(end_date=end_date, start_date=start_date)
+    def _encode(self) -> Iterator[bytes]:
+        yield b"["
+        first = True
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            encoded = orjson.dumps(chunk)[1:-1]  # strip the chunk's own brackets
+            yield encoded if first else b"," + encoded
+            first = False
+        yield b"]"
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        with self._lock:
+            return next(self._encoded)
+
+    def close(self) -> None:
+        with self._lock:
+            self._encoded.close()
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+
+
+def json_array_stream(chunks: Iterable[list]) -> Iterator[bytes]:
+    """Encode chunks of records as one JSON array, a chunk at a time."""
+    return _JsonArrayStream(chunks)
+
+
+class AllTimeCacheWarming(Exception):
+    """The all-time cache is empty and its first fill outlasted REFRESH_WAIT_SECONDS."""
 
-    with cache_lock:
-        cached_all_time["data"] = stocked_lakes
-        cached_all_time["fetched_at"] = now
 
-    return stocked_lakes
+def refresh_all_time_stocked_lakes() -> Tuple[bytes, bytes]:
+    global cached_all_time
+
+    now = datetime.now()
+    start_date = datetime(2000, 1, 1)
+    # Encode chunk by chunk so the full record list is never held alongside
+    # the encoded body.
+    chunks = db.iter_stocked_lakes_data(end_date=now, start_date=start_date)
+    body = b"".join(json_array_stream(chunks))
+    gzipped = gzip.compress(body)
+    cached_all_time = (body, gzipped, now)
+    return body, gzipped
+
+
+def _fresh_all_time() -> Optional[Tuple[bytes, bytes]]:
+    body, gzipped, fetched_at = cached_all_time
+    if body is not None and fetched_at and (datetime.now() - fetched_at) < timedelta(hours=CACHE_TTL_HOURS):
+        return body, gzipped
+    return None
+
+
+def get_cached_all_time_stocked_lakes(force_refresh: bool = False) -> Tuple[bytes, bytes]:
+    """Returns (body, gzipped body)."""
+    body, gzipped, _ = cached_all_time
+    fresh = None if force_refresh else _fresh_all_time()
+    if fresh:
+        return fresh
+
+    # Cache miss or stale; only one thread runs the query (single-flight).
+    if refresh_lock.acquire(blocking=False):
+        try:
+            # Check again: a refresh may have finished between the read above
+            # and taking the lock.
+            fresh = None if force_refresh else _fresh_all_time()
+            return fresh or refresh_all_time_stocked_lakes()
+        finally:
+            refresh_lock.release()
+
+    # Another thread is already refreshing; serve the stale copy meanwhile.
+    if body is not None:
+        return body, gzipped
+
+    # Cold cache: wait for the in-flight refresh to publish. Whoever gets the
+    # lock next only re-runs the query if that refresh failed, so there is
+    # never more than one running at a time.
+    if not refresh_lock.acquire(timeout=REFRESH_WAIT_SECONDS):
+        raise AllTimeCacheWarming()
+    try:
+        body, gzipped, _ = cached_all_time
+        if body is not None:
+            return body, gzipped
+        return refresh_all_time_stocked_lakes()
+    finally:
+        refresh_lock.release()
 
 def parse_query_dates(request: Request):
     now = datetime.now()
@@ -92,6 +201,9 @@ def parse_query_dates(request: Request):
     return start_date, end_date
 
 
+# Compress JSON bodies of 1KB or more; small responses go out as-is.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 app.add_middleware(
     CORSMiddleware,
     # allow_origins=["http://localhost:3000", "https://trout-tracker-wa.vercel.app"],
@@ -154,9 +266,10 @@ async def index_view(request: Request):
                 "description": "Retrieve rich data for a matched hatchery name",
                 "params": {
                     "name": "Hatchery name (required, case-insensitive, partial match supported)",
-                    "recent_limit": "Number of rows in recent_stocking_activity (optional, default: 10)"
+                    "recent_limit": "Number of rows in recent_stocking_activity (optional, default: 10, clamped to 1-100)",
+                    "top_waters_limit": "Number of rows in top_waters (optional, default: all waters, clamped to 1-500)"
                 },
-                "example": "/hatchery_profile?name=Army%20Np(American%20Lk)&recent_limit=10"
+                "example": "/hatchery_profile?name=Army%20Np(American%20Lk)&recent_limit=10&top_waters_limit=20"
             },
             "/derby_lakes_data": {
                 "method": "GET",
@@ -178,54 +291,63 @@ async def index_view(request: Request):
     )
 
 
+# Routes that hit the database are plain `def` so Starlette runs them in its
+# threadpool; the SQLAlchemy calls are blocking and would otherwise stall the
+# event loop for every other in-flight request.
 @app.get("/stocked_lakes_data")
-async def get_stocked_lakes_data(request: Request):
+def get_stocked_lakes_data(request: Request):
     try:
         start_date, end_date = parse_query_dates(request)
-        stocked_lakes = db.get_stocked_lakes_data(
-            end_date=end_date, start_date=start_date)
         last_updated = str(db.get_date_data_updated())
         etag_seed = f"stocked:{start_date.isoformat()}:{end_date.isoformat()}:{last_updated}"
+        # Rows are fetched and encoded before the response starts, so the
+        # connection goes back to the pool regardless of how slowly the
+        # client reads the body.
         return cached_json_response(
-            stocked_lakes,
+            lambda: orjson.dumps(
+                db.get_stocked_lakes_data(end_date=end_date, start_date=start_date)
+            ),
             cache_seconds=DEFAULT_CACHE_TTL_SECONDS,
             etag_seed=etag_seed,
             request=request,
         )
     except Exception as e:
         logger.exception("Failed to fetch stocked lakes data")
-        return {"error": str(e)}
+        return ORJSONResponse(content={"error": str(e)})
 
 @app.get("/stocked_lakes_data_all_time")
-async def get_stocked_lakes_data_all_time(request: Request, refresh: bool = False):
+def get_stocked_lakes_data_all_time(request: Request, refresh: bool = False):
     try:
-        stocked_lakes = get_cached_all_time_stocked_lakes(force_refresh=refresh)
+        body, gzipped = get_cached_all_time_stocked_lakes(force_refresh=refresh)
         last_updated = str(db.get_date_data_updated())
         etag_seed = f"stocked-all-time:{last_updated}"
         return cached_json_response(
-            stocked_lakes,
+            body,
             cache_seconds=CACHE_TTL_HOURS * 3600,
             etag_seed=etag_seed,
             request=request,
+            gzipped=gzipped,
+        )
+    except AllTimeCacheWarming:
+        return ORJSONResponse(
+            status_code=503,
+            content={"error": "All-time data is still loading; try again shortly"},
+            headers={"Retry-After": str(REFRESH_WAIT_SECONDS)},
         )
     except Exception as e:
         logger.exception("Failed to fetch all stocked lakes data")
-        return {"error": str(e)}
+        return ORJSONResponse(content={"error": str(e)})
 
 @app.get("/total_stocked_by_date_data")
-async def get_total_stocked_by_date_data(request: Request):
+def get_total_stocked_by_date_data(request: Request):
     start_date, end_date =  parse_query_dates(request)
     if start_date and end_date:
         total_stocked_by_date = db.get_total_stocked_by_date_data(
             start_date=start_date, end_date=end_date)
-
-        total_stocked_by_date = [{"date": str(date), "stocked_fish": stocked_fish}
-                                for date, stocked_fish in total_stocked_by_date]
-
         last_updated = str(db.get_date_data_updated())
         etag_seed = f"total-by-date:{start_date.isoformat()}:{end_date.isoformat()}:{last_updated}"
         return cached_json_response(
-            total_stocked_by_date,
+            total_stocked_by_date.encode(),
             cache_seconds=DEFAULT_CACHE_TTL_SECONDS,
             etag_seed=etag_seed,
             request=request,
@@ -233,17 +355,15 @@ async def get_total_stocked_by_date_data(request: Request):
 
 
 @app.get("/hatchery_totals")
-async def get_hatchery_totals(request: Request):
+def get_hatchery_totals(request: Request):
     start_date, end_date = parse_query_dates(request)
     if start_date and end_date:
         hatchery_totals = db.get_hatchery_totals(
             start_date=start_date, end_date=end_date)
-        hatchery_totals = [{'hatchery': row[0], 'sum_1': row[1]}
-                        for row in hatchery_totals]
         last_updated = str(db.get_date_data_updated())
         etag_seed = f"hatchery-totals:{start_date.isoformat()}:{end_date.isoformat()}:{last_updated}"
         return cached_json_response(
-            hatchery_totals,
+            hatchery_totals.encode(),
             cache_seconds=DEFAULT_CACHE_TTL_SECONDS,
             etag_seed=etag_seed,
             request=request,
@@ -251,10 +371,10 @@ async def get_hatchery_totals(request: Request):
 
 
 @app.get("/hatchery_profile")
-async def get_hatchery_profile(request: Request):
+def get_hatchery_profile(request: Request):
     hatchery_name = request.query_params.get("name")
     if not hatchery_name:
-        return {"error": "Missing required query parameter: name"}
+        return ORJSONResponse(content={"error": "Missing required query parameter: name"})
 
     recent_limit_str = request.query_params.get("recent_limit", "10")
     try:
@@ -263,11 +383,24 @@ async def get_hatchery_profile(request: Request):
         recent_limit = 10
     recent_limit = max(1, min(recent_limit, 100))
 
+    # Optional cap on top_waters; all waters are returned when it is absent.
+    top_waters_limit = None
+    top_waters_limit_str = request.query_params.get("top_waters_limit")
+    if top_waters_limit_str:
+        try:
+            top_waters_limit = max(1, min(int(top_waters_limit_str), 500))
+        except ValueError:
+            top_waters_limit = None
+
     try:
-        profile = db.get_hatchery_profile(hatchery_name=hatchery_name, recent_limit=recent_limit)
+        profile = db.get_hatchery_profile(
+            hatchery_name=hatchery_name,
+            recent_limit=recent_limit,
+            top_waters_limit=top_waters_limit,
+        )
         last_updated = str(db.get_date_data_updated())
         resolved = (profile or {}).get("resolved_hatchery") or hatchery_name
-        etag_seed = f"hatchery-profile:{resolved.lower()}:{recent_limit}:{last_updated}"
+        etag_seed = f"hatchery-profile:{resolved.lower()}:{recent_limit}:{top_waters_limit}:{last_updated}"
         return cached_json_response(
             profile,
             cache_seconds=DEFAULT_CACHE_TTL_SECONDS,
@@ -276,13 +409,12 @@ async def get_hatchery_profile(request: Request):
         )
     except Exception as e:
         logger.exception("Failed to build hatchery profile for %s", hatchery_name)
-        return {"error": str(e)}
+        return ORJSONResponse(content={"error": str(e)})
 
 
 @app.get("/derby_lakes_data")
-async def get_derby_lakes_data():
+def get_derby_lakes_data():
     derby_lakes = db.get_derby_lakes_data()
-    derby_lakes = [dict(row) for row in derby_lakes]
     return cached_json_response(
         derby_lakes,
         cache_seconds=DEFAULT_CACHE_TTL_SECONDS,
@@ -290,7 +422,7 @@ async def get_derby_lakes_data():
 
 
 @app.get("/date_data_updated")
-async def get_date_data_updated():
+def get_date_data_updated():
     last_updated = db.get_date_data_updated()
     last_updated = str(last_updated)
     return cached_json_response(
@@ -301,7 +433,7 @@ async def get_date_data_updated():
 
 
 @app.get("/hatchery_names")
-async def get_unique_hatcheries():
+def get_unique_hatcheries():
     unique_hatcheries = db.get_unique_hatcheries()
     return cached_json_response(
         unique_hatcheries,
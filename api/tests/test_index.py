@@ -0,0 +1,178 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from starlette.requests import Request
+
+from api import index
+from api.index import json_array_stream
+
+
+class ClosableChunks:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def test_json_array_stream_empty_input():
+    assert orjson.loads(b"".join(json_array_stream([]))) == []
+
+
+def test_json_array_stream_skips_empty_chunks():
+    body = b"".join(json_array_stream([[], [{"a": 1}], []]))
+
+    assert orjson.loads(body) == [{"a": 1}]
+
+
+def test_json_array_stream_single_chunk():
+    records = [{"a": 1}, {"a": 2}]
+
+    assert orjson.loads(b"".join(json_array_stream([records]))) == records
+
+
+def test_json_array_stream_multiple_chunks():
+    chunks = [[{"a": 1}], [{"a": 2}, {"a": 3}], [{"a": 4}]]
+
+    body = b"".join(json_array_stream(chunks))
+
+    assert orjson.loads(body) == [{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}]
+
+
+def test_json_array_stream_close_closes_source_before_iteration():
+    source = ClosableChunks([[{"a": 1}]])
+
+    json_array_stream(source).close()
+
+    assert source.closed
+
+
+def _install_fake_refresh(monkeypatch, calls, started=None, release=None):
+    def fake_refresh():
+        calls.append(1)
+        if started is not None:
+            started.set()
+        if release is not None:
+            release.wait(5)
+        index.cached_all_time = (b"[]", b"gz", datetime.now())
+        return b"[]", b"gz"
+
+    monkeypatch.setattr(index, "refresh_all_time_stocked_lakes", fake_refresh)
+
+
+def test_all_time_cache_cold_refresh_runs_once(monkeypatch):
+    monkeypatch.setattr(index, "cached_all_time", (None, None, None))
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    _install_fake_refresh(monkeypatch, calls, started, release)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(index.get_cached_all_time_stocked_lakes)]
+        started.wait(5)
+        futures += [pool.submit(index.get_cached_all_time_stocked_lakes) for _ in range(7)]
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == [1]
+    assert results == [(b"[]", b"gz")] * 8
+
+
+def test_all_time_cache_serves_stale_body_during_refresh(monkeypatch):
+    stale_at = datetime.now() - timedelta(hours=index.CACHE_TTL_HOURS + 1)
+    monkeypatch.setattr(index, "cached_all_time", (b"[1]", b"old", stale_at))
+    calls = []
+    _install_fake_refresh(monkeypatch, calls)
+
+    with index.refresh_lock:
+        assert index.get_cached_all_time_stocked_lakes() == (b"[1]", b"old")
+    assert calls == []
+
+
+def test_all_time_cache_cold_wait_times_out(monkeypatch):
+    monkeypatch.setattr(index, "cached_all_time", (None, None, None))
+    monkeypatch.setattr(index, "REFRESH_WAIT_SECONDS", 0.01)
+    calls = []
+    _install_fake_refresh(monkeypatch, calls)
+
+    acquired, done = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with index.refresh_lock:
+            acquired.set()
+            done.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    acquired.wait(5)
+    try:
+        with pytest.raises(index.AllTimeCacheWarming):
+            index.get_cached_all_time_stocked_lakes()
+    finally:
+        done.set()
+        holder.join()
+    assert calls == []
+
+
+@pytest.mark.parametrize(
+    "query, recent_limit, top_waters_limit",
+    [
+        (b"name=Army", 10, None),
+        (b"name=Army&recent_limit=0&top_waters_limit=0", 1, 1),
+        (b"name=Army&recent_limit=1000&top_waters_limit=1000", 100, 500),
+        (b"name=Army&recent_limit=-3&top_waters_limit=-3", 1, 1),
+        (b"name=Army&recent_limit=x&top_waters_limit=x", 10, None),
+    ],
+)
+def test_hatchery_profile_clamps_limits(monkeypatch, query, recent_limit, top_waters_limit):
+    calls = []
+
+    def fake_profile(**kwargs):
+        calls.append(kwargs)
+        return {"resolved_hatchery": "Army Np"}
+
+    monkeypatch.setattr(index.db, "get_hatchery_profile", fake_profile)
+    monkeypatch.setattr(index.db, "get_date_data_updated", lambda: "2024-05-01")
+    request = Request({"type": "http", "method": "GET", "query_string": query, "headers": []})
+
+    index.get_hatchery_profile(request)
+
+    assert calls == [
+        {"hatchery_name": "Army", "recent_limit": recent_limit, "top_waters_limit": top_waters_limit}
+    ]
+
+
+def test_all_time_cache_rechecks_after_taking_the_lock(monkeypatch):
+    stale_at = datetime.now() - timedelta(hours=index.CACHE_TTL_HOURS + 1)
+    monkeypatch.setattr(index, "cached_all_time", (b"[1]", b"old", stale_at))
+    calls = []
+    _install_fake_refresh(monkeypatch, calls)
+
+    class LockRefreshedByOtherThread:
+        """Another refresh publishes between the stale read and acquire()."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def acquire(self, *args, **kwargs):
+            index.cached_all_time = (b"[2]", b"new", datetime.now())
+            return self._lock.acquire(*args, **kwargs)
+
+        def release(self):
+            self._lock.release()
+
+    monkeypatch.setattr(index, "refresh_lock", LockRefreshedByOtherThread())
+
+    assert index.get_cached_all_time_stocked_lakes() == (b"[2]", b"new")
+    assert calls == []
+    assert index.get_cached_all_time_stocked_lakes(force_refresh=True) == (b"[]", b"gz")
+    assert calls == [1]
@@ -0,0 +1,56 @@
+# data/cache.py
+
+from functools import wraps
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Every ttl_cache store, so a write can drop them all at once.
+_stores: List[Dict[Tuple, Tuple[float, Any]]] = []
+_stores_lock = Lock()
+
+
+def ttl_cache(ttl: float, maxsize: int = 256, key: Optional[Callable[..., Tuple]] = None):
+    """
+    Memoize a DataBase read method for `ttl` seconds, thread-safe.
+
+    `key` maps the call's arguments (without `self`) to the cache key; by
+    default the raw args/kwargs are used.
+    """
+    def decorator(func):
+        store: Dict[Tuple, Tuple[float, Any]] = {}
+        lock = Lock()
+        with _stores_lock:
+            _stores.append(store)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            now = monotonic()
+            with lock:
+                hit = store.get(cache_key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+
+            value = func(self, *args, **kwargs)
+
+            with lock:
+                if len(store) >= maxsize:
+                    for k in [k for k, (expires_at, _) in store.items() if expires_at <= now]:
+                        del store[k]
+                    if len(store) >= maxsize:
+                        del store[next(iter(store))]
+                store[cache_key] = (now + ttl, value)
+            return value
+
+        wrapper.cache_clear = store.clear
+        return wrapper
+
+    return decorator
+
+
+def clear_caches():
+    """Drop every ttl_cache entry in this process (call after writes)."""
+    with _stores_lock:
+        for store in _stores:
+            store.clear()
@@ -1,123 +1,346 @@
 # data/database.py
 
+import logging
 import os
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, date as dt_date
 from statistics import median
-from typing import Any, Dict, List, Optional, Set, Tuple
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
-from sqlalchemy import create_engine, exists, func, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_, case, create_engine, exists, extract, false, func, or_, select, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from data.cache import clear_caches, ttl_cache
 from data.models import WaterLocation, StockingReport, DerbyParticipant, Utility, Base
 
 
-def _norm_text(v: Optional[str]) -> Optional[str]:
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT in write_lake_data
+INSERT_BATCH_SIZE = 1000
+
+# Read caches; cleared in-process after write_data commits.
+READ_CACHE_TTL_SECONDS = 300
+HATCHERY_NAMES_TTL_SECONDS = 3600
+# Profiles carry every event for the hatchery, so keep only a few.
+HATCHERY_PROFILE_CACHE_SIZE = 32
+
+
+# Raw read queries, built once at import. The JSON aggregates are rendered by
+# the database (json_group_array on SQLite, json_agg on Postgres) so the API
+# can send the text as-is.
+_HATCHERY_TOTALS_SQLITE = text("""
+    SELECT json_group_array(json_object('hatchery', hatchery, 'sum_1', sum_1))
+    FROM (
+      SELECT hatchery, SUM(stocked_fish) AS sum_1
+      FROM stocking_report
+      WHERE date BETWEEN :start_date AND :end_date
+      GROUP BY hatchery
+      ORDER BY sum_1 DESC
+    ) q
+""")
+
+_HATCHERY_TOTALS_PG = text("""
+    SELECT COALESCE(json_agg(json_build_object('hatchery', hatchery, 'sum_1', sum_1) ORDER BY sum_1 DESC), '[]')::text
+    FROM (
+      SELECT hatchery, SUM(stocked_fish) AS sum_1
+      FROM stocking_report
+      WHERE date BETWEEN :start_date AND :end_date
+      GROUP BY hatchery
+    ) q
+""")
+
+_TOTAL_BY_DATE_SQLITE = text("""
+    SELECT json_group_array(json_object('date', date, 'stocked_fish', sum_1))
+    FROM (
+        SELECT date, SUM(stocked_fish) AS sum_1
+        FROM stocking_report
+        WHERE date BETWEEN :start_date AND :end_date
+        GROUP BY date
+        ORDER BY date
+    ) q
+""")
+
+_TOTAL_BY_DATE_PG = text("""
+    SELECT COALESCE(
+        json_agg(json_build_object('date', to_char(date, 'YYYY-MM-DD'), 'stocked_fish', sum_1) ORDER BY date),
+        '[]'
+    )::text
+    FROM (
+        SELECT date, SUM(stocked_fish) AS sum_1
+        FROM stocking_report
+        WHERE date BETWEEN :start_date AND :end_date
+        GROUP BY date
+    ) q
+""")
+
+_DERBY_LAKES_SQL = text("SELECT * FROM derby_participant")
+_UNIQUE_HATCHERIES_SQL = text("SELECT DISTINCT hatchery FROM stocking_report ORDER BY hatchery")
+_DATE_UPDATED_SQL = text("SELECT updated FROM utility ORDER BY id DESC LIMIT 1")
+
+
+def _as_day(value, round_up: bool = False) -> dt_date:
+    if not isinstance(value, datetime):
+        return value
+    day = value.date()
+    if round_up and value.time() != datetime.min.time():
+        day += timedelta(days=1)
+    return day
+
+
+def _default_date_range(
+    end_date: Optional[datetime] = None,
+    start_date: Optional[datetime] = None
+) -> Tuple[dt_date, dt_date]:
+    """
+    Fill in the last-7-days window per call (a datetime.now() default argument
+    is frozen at import time) and snap it to whole days. stocking_report.date
+    is a DATE, so the snapped bounds match exactly the same rows, and every
+    request for the same days shares one cache entry; it doubles as the
+    cache key so the key and the queried bounds can't drift apart.
+    """
+    now = datetime.now()
+    end_date = end_date or now
+    start_date = start_date or now - timedelta(days=7)
+    return _as_day(end_date), _as_day(start_date, round_up=True)
+
+
+def _key_text(v: Optional[str]) -> Optional[str]:
+    """Python side of NULLIF(LOWER(TRIM(v)), '') used by the dedup preload."""
     if v is None:
         return None
-    v = v.strip().lower()
-    return v if v else None
+    return v.strip(" ").lower() or None
+
+
+@dataclass(slots=True)
+class StockedLakeRecord:
+    """One row of /stocked_lakes_data; orjson serializes it (and its date) natively."""
+    date: Optional[dt_date]
+    water_name_cleaned: Optional[str]
+    stocked_fish: Optional[int]
+    species: Optional[str]
+    hatchery: Optional[str]
+    weight: Optional[float]
+    derby_participant: Optional[bool]
+    water_location_id: int
+    latitude: Optional[float]
+    longitude: Optional[float]
+    directions: Optional[str]
+
+
+class _StockedLakeChunks:
+    """
+    Iterator over chunks of StockedLakeRecord from an executed result. It
+    owns the connection: exhausting it, an error, or close() releases it,
+    whether or not iteration ever started.
+    """
+
+    def __init__(self, conn, result):
+        self._conn = conn
+        self._partitions = result.partitions()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> List[StockedLakeRecord]:
+        if self._conn is None:
+            raise StopIteration
+        try:
+            partition = next(self._partitions)
+        except BaseException:
+            self.close()
+            raise
+        return [StockedLakeRecord(*row) for row in partition]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            conn.close()
+
+
+_engine = None
+_engine_lock = Lock()
+
+
+def _pool_limits() -> Tuple[int, int]:
+    """(pool_size, max_overflow) for the long-lived Postgres pool."""
+    return int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "5"))
+
+
+def _create_engine_from_env():
+    db_user = os.getenv("POSTGRES_USER")
+    db_password = os.getenv("POSTGRES_PASSWORD")
+    db_name = os.getenv("POSTGRES_DB")
+    db_host = os.getenv("POSTGRES_HOST")
+    db_port = os.getenv("POSTGRES_PORT", "5432")  # Default Postgres port
+
+    if db_user and db_password and db_name and db_host:
+        database_url = f'postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
+
+        if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+            # A Lambda container serves one request at a time and may sit
+            # frozen between invocations; don't keep idle sockets around.
+            return create_engine(
+                database_url,
+                poolclass=NullPool,
+                connect_args={"connect_timeout": 20}
+            )
 
+        pool_size, max_overflow = _pool_limits()
+        return create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            # Per process. Every Gunicorn worker gets its own pool, so keep
+            # workers x (pool + overflow) under the server's max_connections
+            # (100 by default on Postgres): 5 + 5 fits 9 workers.
+            # A checkout that finds the pool exhausted fails after
+            # pool_timeout rather than queueing indefinitely.
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=10,
+            connect_args={"connect_timeout": 20}
+        )
 
-class DataBase:
-    def __init__(self):
-        # Load Database
-        db_user = os.getenv("POSTGRES_USER")
-        db_password = os.getenv("POSTGRES_PASSWORD")
-        db_name = os.getenv("POSTGRES_DB")
-        db_host = os.getenv("POSTGRES_HOST")
-        db_port = os.getenv("POSTGRES_PORT", "5432")  # Default Postgres port
+    logger.info("No Postgres settings found; using SQLite at data/sqlite.db")
+    return create_engine(
+        'sqlite:///data/sqlite.db',
+        connect_args={"check_same_thread": False},
+    )
 
-        if db_user and db_password and db_name and db_host:
-            database_url = f'postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
 
-            self.engine = create_engine(
-                database_url,
-                pool_pre_ping=True,
-                pool_recycle=1800,
-                connect_args={"connect_timeout": 20}
-            )
-        else:
-            print("USING SQLITE DB")
-            self.engine = create_engine(
-                'sqlite:///data/sqlite.db',
-                connect_args={"check_same_thread": False},
-            )
+def get_engine():
+    """Process-wide engine, created on first use and shared by every DataBase."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine_from_env()
+    return _engine
 
-        self.conn = self.engine.connect()
+
+class DataBase:
+    def __init__(self):
+        # Load Database
+        self.engine = get_engine()
 
         # IMPORTANT: turn off autoflush to avoid query-invoked autoflush exceptions
         self.Session = sessionmaker(bind=self.engine, autoflush=False)
-        self.session = self.Session()
+        # Thread-local session: API routes run in a threadpool, and a Session
+        # must never be shared between threads.
+        self.session = scoped_session(self.Session)
 
+        self.is_sqlite = self.engine.dialect.name == "sqlite"
         self.insert_counter = 0
 
-    # -------- Reading helpers (unchanged) --------
-    def get_stocked_lakes_data(
-        self,
-        end_date: datetime = datetime.now(),
-        start_date: datetime = datetime.now() - timedelta(days=7)
-    ):
-        rows = (
-            self.session
-                .query(WaterLocation, StockingReport)
-                .join(StockingReport, StockingReport.water_location_id == WaterLocation.id)
-                .filter(StockingReport.date.between(start_date, end_date))
-                .order_by(StockingReport.date.desc())
-                .all()
-        )
+    @contextmanager
+    def _conn(self):
+        """Pooled connection for a single read; returned to the pool on exit."""
+        with self.engine.begin() as conn:
+            yield conn
 
-        result = []
-        for water_loc, stocked in rows:
-            rec = {
-                "date": stocked.date.isoformat() if stocked.date else None,
-                "water_name_cleaned": water_loc.water_name_cleaned,
-                "stocked_fish": stocked.stocked_fish,
-                "species": stocked.species,
-                "hatchery": stocked.hatchery,
-                "weight": stocked.weight,
-                "derby_participant": water_loc.derby_participant,
-                "water_location_id": water_loc.id,
-                "latitude": water_loc.latitude,
-                "longitude": water_loc.longitude,
-                "directions": water_loc.directions,
-            }
-            result.append(rec)
-
-        return result
-
-    def get_hatchery_totals(self, end_date=datetime.now(), start_date=datetime.now() - timedelta(days=7)):
-        query = """
-          SELECT hatchery, SUM(stocked_fish) AS sum_1
-          FROM stocking_report
-          WHERE date BETWEEN :start_date AND :end_date
-          GROUP BY hatchery
-          ORDER BY sum_1 DESC
+    @contextmanager
+    def _snapshot_conn(self):
         """
-        return self.conn.execute(text(query), {"start_date": start_date, "end_date": end_date}).fetchall()
-
-    def get_total_stocked_by_date_data(self, end_date=datetime.now(), start_date=datetime.now() - timedelta(days=7)):
-        query = """
-            SELECT date, SUM(stocked_fish) AS sum_1
-            FROM stocking_report
-            WHERE date BETWEEN :start_date AND :end_date
-            GROUP BY date
-            ORDER BY date
+        Like _conn, for reads that span several statements: on Postgres the
+        transaction runs at REPEATABLE READ, so every statement sees the same
+        snapshot even if a write commits in between.
         """
-        rows = self.conn.execute(text(query), {"start_date": start_date, "end_date": end_date}).fetchall()
+        with self.engine.connect() as conn:
+            if not self.is_sqlite:
+                conn.execution_options(isolation_level="REPEATABLE READ")
+            with conn.begin():
+                yield conn
+
+    # -------- Reading helpers --------
+    def iter_stocked_lakes_data(
+        self,
+        end_date: Optional[datetime] = None,
+        start_date: Optional[datetime] = None
+    ) -> Iterator[List[StockedLakeRecord]]:
+        """
+        Return an iterator of stocked-lake record chunks as they come off the
+        cursor. The query runs before this returns, so database errors surface
+        to the caller right away. The iterator holds a connection until it is
+        exhausted or closed; callers that may stop early must call close().
+        """
+        end_date, start_date = _default_date_range(end_date, start_date)
+        # Core select of just the columns we emit: no ORM entities, no identity
+        # map, and rows are streamed from the cursor in chunks. Column order
+        # must match StockedLakeRecord's field order.
+        stmt = (
+            select(
+                StockingReport.date,
+                WaterLocation.water_name_cleaned,
+                StockingReport.stocked_fish,
+                StockingReport.species,
+                StockingReport.hatchery,
+                StockingReport.weight,
+                WaterLocation.derby_participant,
+                WaterLocation.id.label("water_location_id"),
+                WaterLocation.latitude,
+                WaterLocation.longitude,
+                WaterLocation.directions,
+            )
+            .select_from(WaterLocation)
+            .join(StockingReport, StockingReport.water_location_id == WaterLocation.id)
+            .where(StockingReport.date.between(start_date, end_date))
+            .order_by(StockingReport.date.desc())
+        )
 
-        if str(self.engine) == "Engine(sqlite:///data/sqlite.db)":
-            rows = [(datetime.strptime(date_str, "%Y-%m-%d"), stocked_fish) for date_str, stocked_fish in rows]
-        return rows
+        # stream_results asks psycopg2 for a server-side (named) cursor, so
+        # libpq never buffers the whole range client-side; yield_per sets the
+        # fetch size. SQLite ignores it.
+        conn = self.engine.connect()
+        try:
+            result = conn.execution_options(stream_results=True, yield_per=5000).execute(stmt)
+        except Exception:
+            conn.close()
+            raise
+        return _StockedLakeChunks(conn, result)
 
-    def get_derby_lakes_data(self):
-        return self.conn.execute(text("SELECT * FROM derby_participant")).fetchall()
+    def get_stocked_lakes_data(
+        self,
+        end_date: Optional[datetime] = None,
+        start_date: Optional[datetime] = None
+    ) -> List[StockedLakeRecord]:
+        return [
+            record
+            for chunk in self.iter_stocked_lakes_data(end_date=end_date, start_date=start_date)
+            for record in chunk
+        ]
 
+    @ttl_cache(READ_CACHE_TTL_SECONDS, key=_default_date_range)
+    def get_hatchery_totals(self, end_date=None, start_date=None) -> str:
+        end_date, start_date = _default_date_range(end_date, start_date)
+        query = _HATCHERY_TOTALS_SQLITE if self.is_sqlite else _HATCHERY_TOTALS_PG
+        with self._conn() as conn:
+            return conn.execute(query, {"start_date": start_date, "end_date": end_date}).scalar()
+
+    @ttl_cache(READ_CACHE_TTL_SECONDS, key=_default_date_range)
+    def get_total_stocked_by_date_data(self, end_date=None, start_date=None) -> str:
+        end_date, start_date = _default_date_range(end_date, start_date)
+        query = _TOTAL_BY_DATE_SQLITE if self.is_sqlite else _TOTAL_BY_DATE_PG
+        with self._conn() as conn:
+            return conn.execute(query, {"start_date": start_date, "end_date": end_date}).scalar()
+
+    @ttl_cache(READ_CACHE_TTL_SECONDS)
+    def get_derby_lakes_data(self) -> List[Dict[str, Any]]:
+        with self._conn() as conn:
+            return [dict(row) for row in conn.execute(_DERBY_LAKES_SQL).mappings()]
+
+    @ttl_cache(HATCHERY_NAMES_TTL_SECONDS)
     def get_unique_hatcheries(self):
-        rows = self.conn.execute(text("SELECT DISTINCT hatchery FROM stocking_report ORDER BY hatchery")).fetchall()
+        with self._conn() as conn:
+            rows = conn.execute(_UNIQUE_HATCHERIES_SQL).fetchall()
         return [row[0] for row in rows]
 
-    def get_hatchery_profile(self, hatchery_name: str, recent_limit: int = 10):
+    def get_hatchery_profile(self, hatchery_name: str, recent_limit: int = 10, top_waters_limit: Optional[int] = None):
         query = (hatchery_name or "").strip()
         if not query:
             return {
@@ -136,339 +359,331 @@ class DataBase:
                 "geo_bounds": None,
             }
 
-        pattern = f"%{query.lower()}%"
-        candidate_rows = (
-            self.session.query(
-                StockingReport.hatchery.label("hatchery"),
-                func.count(StockingReport.id).label("stocking_events"),
-                func.coalesce(func.sum(StockingReport.stocked_fish), 0).label("total_fish_stocked"),
-            )
-            .filter(StockingReport.hatchery.isnot(None))
-            .filter(func.lower(StockingReport.hatchery).like(pattern))
-            .group_by(StockingReport.hatchery)
-            .order_by(
-                func.coalesce(func.sum(StockingReport.stocked_fish), 0).desc(),
-                func.count(StockingReport.id).desc(),
-                StockingReport.hatchery.asc(),
-            )
-            .all()
-        )
-
-        matches = [
-            {
-                "hatchery": row.hatchery,
-                "stocking_events": int(row.stocking_events or 0),
-                "total_fish_stocked": int(row.total_fish_stocked or 0),
-            }
-            for row in candidate_rows
-        ]
-
-        if not matches:
-            return {
-                "query": query,
-                "resolved_hatchery": None,
-                "match_strategy": "none",
-                "match_count": 0,
-                "matches": [],
-                "summary": None,
-                "top_waters": [],
-                "species_breakdown": [],
-                "yearly_totals": [],
-                "monthly_totals": [],
-                "recent_stocking_activity": [],
-                "all_stocking_activity": [],
-                "geo_bounds": None,
-            }
-
-        exact_match = next((m for m in matches if (m["hatchery"] or "").lower() == query.lower()), None)
-        resolved_hatchery = exact_match["hatchery"] if exact_match else matches[0]["hatchery"]
-        match_strategy = "exact_case_insensitive" if exact_match else "best_partial_by_total_fish"
-
-        rows = (
-            self.session.query(WaterLocation, StockingReport)
-            .join(StockingReport, StockingReport.water_location_id == WaterLocation.id)
-            .filter(func.lower(StockingReport.hatchery) == resolved_hatchery.lower())
-            .order_by(StockingReport.date.desc(), StockingReport.id.desc())
-            .all()
-        )
-
-        def _coerce_date(v):
-            if v is None:
-                return None
-            if isinstance(v, datetime):
-                return v.date()
-            if isinstance(v, dt_date):
-                return v
-            if isinstance(v, str):
-                try:
-                    return datetime.strptime(v, "%Y-%m-%d").date()
-                except ValueError:
-                    return None
-            return None
+        # One cached profile per name; the limits only slice it, so every
+        # limit combination shares the same copy of the event list.
+        profile = self._hatchery_profile(query)
+        recent_limit = max(1, int(recent_limit or 10))
+        top_waters = profile["top_waters"]
+        return {
+            **profile,
+            "top_waters": top_waters[:top_waters_limit] if top_waters_limit else top_waters,
+            "recent_stocking_activity": profile["all_stocking_activity"][:recent_limit],
+        }
 
-        def _iso(v):
-            d = _coerce_date(v)
-            return d.isoformat() if d else None
+    @ttl_cache(READ_CACHE_TTL_SECONDS, maxsize=HATCHERY_PROFILE_CACHE_SIZE)
+    def _hatchery_profile(self, query: str):
+        # The profile is aggregated by the database with GROUP BY queries over
+        # the resolved hatchery's events; only the per-event list comes back
+        # row by row. All reads share one connection and one snapshot, so the
+        # lists and totals agree with each other.
+        water_name = func.coalesce(func.nullif(WaterLocation.water_name_cleaned, ''), 'Unknown Water')
+        species_name = func.coalesce(func.nullif(StockingReport.species, ''), 'Unknown Species')
+        fish = func.coalesce(StockingReport.stocked_fish, 0)
+        year = extract('year', StockingReport.date)
+        month = extract('month', StockingReport.date)
+        has_coordinates = and_(WaterLocation.latitude.isnot(None), WaterLocation.longitude.isnot(None))
+        is_derby = WaterLocation.derby_participant.is_(True)
+
+        def _select(*columns):
+            return (
+                select(*columns)
+                .select_from(WaterLocation)
+                .join(StockingReport, StockingReport.water_location_id == WaterLocation.id)
+                .where(func.lower(StockingReport.hatchery) == resolved_hatchery.lower())
+            )
 
         def _safe_round(v: Optional[float], digits: int = 2):
             if v is None:
                 return None
             return round(float(v), digits)
 
-        total_fish_stocked = 0
-        stocking_events = 0
-        unique_waters = set()
-        unique_species = set()
-        fish_counts: List[int] = []
-        weights: List[float] = []
-        dates: List[dt_date] = []
-        derby_stocking_events = 0
-        unique_waters_with_coordinates = set()
-        unique_derby_waters = set()
-
-        water_totals: Dict[str, Dict[str, Any]] = {}
-        species_totals: Dict[str, Dict[str, Any]] = {}
-        yearly_totals: Dict[int, Dict[str, Any]] = {}
-        monthly_totals: Dict[int, Dict[str, Any]] = {}
-        all_stocking_activity: List[Dict[str, Any]] = []
-
-        coordinate_points = set()
-
-        for water_loc, stocked in rows:
-            fish_stocked = int(stocked.stocked_fish or 0)
-            stocking_events += 1
-            total_fish_stocked += fish_stocked
-            fish_counts.append(fish_stocked)
-
-            event_date = _coerce_date(stocked.date)
-            if event_date:
-                dates.append(event_date)
-
-            weight_value = float(stocked.weight) if stocked.weight is not None else None
-            if weight_value is not None:
-                weights.append(weight_value)
-
-            water_name = water_loc.water_name_cleaned or "Unknown Water"
-            species_name = stocked.species or "Unknown Species"
-            unique_waters.add(water_name)
-            unique_species.add(species_name)
-
-            if water_loc.derby_participant:
-                derby_stocking_events += 1
-                unique_derby_waters.add(water_name)
-
-            if water_loc.latitude is not None and water_loc.longitude is not None:
-                lat = float(water_loc.latitude)
-                lon = float(water_loc.longitude)
-                coordinate_points.add((lat, lon))
-                unique_waters_with_coordinates.add(water_name)
-
-            event_record = {
-                "date": _iso(stocked.date),
-                "water_name": water_name,
-                "species": species_name,
-                "fish_stocked": fish_stocked,
-                "weight": weight_value,
-                "latitude": water_loc.latitude,
-                "longitude": water_loc.longitude,
-                "directions": water_loc.directions,
-                "derby_participant": bool(water_loc.derby_participant),
-            }
-            all_stocking_activity.append(event_record)
+        def _iso(v):
+            return v.isoformat() if v else None
+
+        pattern = f"%{query.lower()}%"
+        with self._snapshot_conn() as conn:
+            candidate_rows = conn.execute(
+                select(
+                    StockingReport.hatchery.label("hatchery"),
+                    func.count(StockingReport.id).label("stocking_events"),
+                    func.coalesce(func.sum(StockingReport.stocked_fish), 0).label("total_fish_stocked"),
+                )
+                .where(StockingReport.hatchery.isnot(None))
+                .where(func.lower(StockingReport.hatchery).like(pattern))
+                .group_by(StockingReport.hatchery)
+                .order_by(
+                    func.coalesce(func.sum(StockingReport.stocked_fish), 0).desc(),
+                    func.count(StockingReport.id).desc(),
+                    StockingReport.hatchery.asc(),
+                )
+            ).all()
 
-            water_entry = water_totals.setdefault(
-                water_name,
+            matches = [
                 {
-                    "water_name": water_name,
-                    "total_fish_stocked": 0,
-                    "stocking_events": 0,
-                    "first_stocking_date": None,
-                    "most_recent_stocking_date": None,
-                    "latitude": water_loc.latitude,
-                    "longitude": water_loc.longitude,
-                    "directions": water_loc.directions,
-                    "derby_participant": bool(water_loc.derby_participant),
-                    "species_set": set(),
-                },
+                    "hatchery": row.hatchery,
+                    "stocking_events": int(row.stocking_events or 0),
+                    "total_fish_stocked": int(row.total_fish_stocked or 0),
+                }
+                for row in candidate_rows
+            ]
+
+            if not matches:
+                return {
+                    "query": query,
+                    "resolved_hatchery": None,
+                    "match_strategy": "none",
+                    "match_count": 0,
+                    "matches": [],
+                    "summary": None,
+                    "top_waters": [],
+                    "species_breakdown": [],
+                    "yearly_totals": [],
+                    "monthly_totals": [],
+                    "recent_stocking_activity": [],
+                    "all_stocking_activity": [],
+                    "geo_bounds": None,
+                }
+
+            exact_match = next((m for m in matches if (m["hatchery"] or "").lower() == query.lower()), None)
+            resolved_hatchery = exact_match["hatchery"] if exact_match else matches[0]["hatchery"]
+            match_strategy = "exact_case_insensitive" if exact_match else "best_partial_by_total_fish"
+
+            events = conn.execute(
+                _select(
+                    StockingReport.date,
+                    water_name,
+                    species_name,
+                    fish,
+                    StockingReport.weight,
+                    WaterLocation.latitude,
+                    WaterLocation.longitude,
+                    WaterLocation.directions,
+                    WaterLocation.derby_participant,
+                )
+                .order_by(StockingReport.date.desc(), StockingReport.id.desc())
+                # Fetched in chunks and turned into dicts as they arrive,
+                # rather than materialized as a full row list first.
+                .execution_options(yield_per=5000)
             )
-            water_entry["total_fish_stocked"] += fish_stocked
-            water_entry["stocking_events"] += 1
-            water_entry["species_set"].add(species_name)
-
-            if event_date:
-                if not water_entry["first_stocking_date"] or event_date < water_entry["first_stocking_date"]:
-                    water_entry["first_stocking_date"] = event_date
-                if not water_entry["most_recent_stocking_date"] or event_date > water_entry["most_recent_stocking_date"]:
-                    water_entry["most_recent_stocking_date"] = event_date
-
-            species_entry = species_totals.setdefault(
-                species_name,
+            all_stocking_activity: List[Dict[str, Any]] = [
                 {
-                    "species": species_name,
-                    "total_fish_stocked": 0,
-                    "stocking_events": 0,
-                    "weights": [],
-                },
-            )
-            species_entry["total_fish_stocked"] += fish_stocked
-            species_entry["stocking_events"] += 1
-            if weight_value is not None:
-                species_entry["weights"].append(weight_value)
-
-            if event_date:
-                year_entry = yearly_totals.setdefault(
-                    event_date.year,
-                    {
-                        "year": event_date.year,
-                        "total_fish_stocked": 0,
-                        "stocking_events": 0,
-                        "waters_set": set(),
-                        "species_set": set(),
-                    },
+                    "date": _iso(event_date),
+                    "water_name": name,
+                    "species": species,
+                    "fish_stocked": int(fish_stocked),
+                    "weight": float(weight) if weight is not None else None,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "directions": directions,
+                    "derby_participant": bool(derby),
+                }
+                for event_date, name, species, fish_stocked, weight, latitude, longitude, directions, derby in events
+            ]
+
+            totals = conn.execute(
+                _select(
+                    func.count(),
+                    func.sum(fish),
+                    func.avg(StockingReport.weight),
+                    func.min(StockingReport.date),
+                    func.max(StockingReport.date),
+                    func.count(year.distinct()),
+                    func.count(water_name.distinct()),
+                    func.count(species_name.distinct()),
+                    func.count(case((is_derby, 1))),
+                    func.count(case((is_derby, water_name)).distinct()),
+                    func.count(case((has_coordinates, water_name)).distinct()),
                 )
-                year_entry["total_fish_stocked"] += fish_stocked
-                year_entry["stocking_events"] += 1
-                year_entry["waters_set"].add(water_name)
-                year_entry["species_set"].add(species_name)
-
-                month_entry = monthly_totals.setdefault(
-                    event_date.month,
-                    {
-                        "month_number": event_date.month,
-                        "month": event_date.strftime("%b"),
-                        "total_fish_stocked": 0,
-                        "stocking_events": 0,
-                    },
+            ).one()
+
+            water_rows = conn.execute(
+                _select(
+                    water_name,
+                    func.sum(fish),
+                    func.count(),
+                    func.min(StockingReport.date),
+                    func.max(StockingReport.date),
+                ).group_by(water_name)
+            ).all()
+
+            water_species = conn.execute(
+                _select(water_name, species_name).distinct()
+            ).all()
+
+            species_rows = conn.execute(
+                _select(
+                    species_name,
+                    func.sum(fish),
+                    func.count(),
+                    func.avg(StockingReport.weight),
+                ).group_by(species_name)
+            ).all()
+
+            year_rows = conn.execute(
+                _select(
+                    year,
+                    func.sum(fish),
+                    func.count(),
+                    func.count(water_name.distinct()),
+                    func.count(species_name.distinct()),
                 )
-                month_entry["total_fish_stocked"] += fish_stocked
-                month_entry["stocking_events"] += 1
+                .where(StockingReport.date.isnot(None))
+                .group_by(year)
+                .order_by(year)
+            ).all()
+
+            month_rows = conn.execute(
+                _select(month, func.sum(fish), func.count())
+                .where(StockingReport.date.isnot(None))
+                .group_by(month)
+                .order_by(month)
+            ).all()
+
+            points = (
+                _select(WaterLocation.latitude.label("lat"), WaterLocation.longitude.label("lon"))
+                .where(has_coordinates)
+                .distinct()
+                .subquery()
+            )
+            bounds = conn.execute(
+                select(
+                    func.count(),
+                    func.min(points.c.lat),
+                    func.max(points.c.lat),
+                    func.min(points.c.lon),
+                    func.max(points.c.lon),
+                    func.avg(points.c.lat),
+                    func.avg(points.c.lon),
+                )
+            ).one()
+
+        (
+            stocking_events, total_fish_stocked, average_weight, first_date, last_date, active_years,
+            unique_waters, unique_species, derby_stocking_events, derby_waters, waters_with_coordinates,
+        ) = totals
+        total_fish_stocked = int(total_fish_stocked or 0)
+        active_years = int(active_years)
+
+        def _share(fish_total):
+            return _safe_round((fish_total / total_fish_stocked) * 100 if total_fish_stocked else 0, 2)
 
-        if coordinate_points:
-            latitudes = [point[0] for point in coordinate_points]
-            longitudes = [point[1] for point in coordinate_points]
+        if bounds[0]:
             geo_bounds = {
-                "min_latitude": min(latitudes),
-                "max_latitude": max(latitudes),
-                "min_longitude": min(longitudes),
-                "max_longitude": max(longitudes),
-                "center_latitude": _safe_round(sum(latitudes) / len(latitudes), 6),
-                "center_longitude": _safe_round(sum(longitudes) / len(longitudes), 6),
+                "min_latitude": bounds[1],
+                "max_latitude": bounds[2],
+                "min_longitude": bounds[3],
+                "max_longitude": bounds[4],
+                "center_latitude": _safe_round(bounds[5], 6),
+                "center_longitude": _safe_round(bounds[6], 6),
             }
         else:
             geo_bounds = None
 
-        average_weight = (sum(weights) / len(weights)) if weights else None
-        average_fish_per_event = (total_fish_stocked / stocking_events) if stocking_events else None
-        median_fish_per_event = median(fish_counts) if fish_counts else None
-        first_recorded_stocking = min(dates).isoformat() if dates else None
-        most_recent_stocking = max(dates).isoformat() if dates else None
-        active_years = len({d.year for d in dates}) if dates else 0
+        # Location details for each water come from its most recent event:
+        # events are newest first, so walking them in reverse leaves the
+        # newest one per water in the dict.
+        latest_event_by_water: Dict[str, Dict[str, Any]] = {
+            event["water_name"]: event for event in reversed(all_stocking_activity)
+        }
+
+        species_by_water: Dict[str, List[str]] = defaultdict(list)
+        for name, species in water_species:
+            species_by_water[name].append(species)
 
         top_waters = []
-        for data in water_totals.values():
+        for name, fish_total, event_count, first_stocked, last_stocked in water_rows:
+            latest = latest_event_by_water[name]
+            fish_total = int(fish_total or 0)
             top_waters.append(
                 {
-                    "water_name": data["water_name"],
-                    "total_fish_stocked": data["total_fish_stocked"],
-                    "stocking_events": data["stocking_events"],
-                    "first_stocking_date": data["first_stocking_date"].isoformat() if data["first_stocking_date"] else None,
-                    "most_recent_stocking_date": data["most_recent_stocking_date"].isoformat() if data["most_recent_stocking_date"] else None,
-                    "species": sorted(data["species_set"]),
-                    "latitude": data["latitude"],
-                    "longitude": data["longitude"],
-                    "directions": data["directions"],
-                    "derby_participant": data["derby_participant"],
-                    "share_of_total_fish_pct": _safe_round(
-                        (data["total_fish_stocked"] / total_fish_stocked) * 100 if total_fish_stocked else 0,
-                        2,
-                    ),
+                    "water_name": name,
+                    "total_fish_stocked": fish_total,
+                    "stocking_events": event_count,
+                    "first_stocking_date": _iso(first_stocked),
+                    "most_recent_stocking_date": _iso(last_stocked),
+                    "species": sorted(species_by_water[name]),
+                    "latitude": latest["latitude"],
+                    "longitude": latest["longitude"],
+                    "directions": latest["directions"],
+                    "derby_participant": latest["derby_participant"],
+                    "share_of_total_fish_pct": _share(fish_total),
                 }
             )
-        top_waters.sort(
-            key=lambda x: (-x["total_fish_stocked"], -x["stocking_events"], x["water_name"])
-        )
+
+        def top_waters_key(x):
+            return (-x["total_fish_stocked"], -x["stocking_events"], x["water_name"])
+
+        top_waters.sort(key=top_waters_key)
 
         species_breakdown = []
-        for data in species_totals.values():
+        for species, fish_total, event_count, species_weight in species_rows:
+            fish_total = int(fish_total or 0)
             species_breakdown.append(
                 {
-                    "species": data["species"],
-                    "total_fish_stocked": data["total_fish_stocked"],
-                    "stocking_events": data["stocking_events"],
-                    "average_weight": _safe_round(
-                        sum(data["weights"]) / len(data["weights"]) if data["weights"] else None,
-                        2,
-                    ),
-                    "share_of_total_fish_pct": _safe_round(
-                        (data["total_fish_stocked"] / total_fish_stocked) * 100 if total_fish_stocked else 0,
-                        2,
-                    ),
+                    "species": species,
+                    "total_fish_stocked": fish_total,
+                    "stocking_events": event_count,
+                    "average_weight": _safe_round(species_weight, 2),
+                    "share_of_total_fish_pct": _share(fish_total),
                 }
             )
         species_breakdown.sort(
             key=lambda x: (-x["total_fish_stocked"], -x["stocking_events"], x["species"])
         )
 
-        yearly_summary = []
-        for year in sorted(yearly_totals.keys()):
-            data = yearly_totals[year]
-            yearly_summary.append(
-                {
-                    "year": data["year"],
-                    "total_fish_stocked": data["total_fish_stocked"],
-                    "stocking_events": data["stocking_events"],
-                    "unique_waters_served": len(data["waters_set"]),
-                    "unique_species_stocked": len(data["species_set"]),
-                    "average_fish_per_event": _safe_round(
-                        data["total_fish_stocked"] / data["stocking_events"] if data["stocking_events"] else None,
-                        2,
-                    ),
-                }
-            )
-
-        monthly_summary = []
-        for month in sorted(monthly_totals.keys()):
-            data = monthly_totals[month]
-            monthly_summary.append(
-                {
-                    "month_number": data["month_number"],
-                    "month": data["month"],
-                    "total_fish_stocked": data["total_fish_stocked"],
-                    "stocking_events": data["stocking_events"],
-                    "average_fish_per_event": _safe_round(
-                        data["total_fish_stocked"] / data["stocking_events"] if data["stocking_events"] else None,
-                        2,
-                    ),
-                }
-            )
+        yearly_summary = [
+            {
+                "year": int(event_year),
+                "total_fish_stocked": int(fish_total or 0),
+                "stocking_events": event_count,
+                "unique_waters_served": waters_served,
+                "unique_species_stocked": species_stocked,
+                "average_fish_per_event": _safe_round(int(fish_total or 0) / event_count, 2),
+            }
+            for event_year, fish_total, event_count, waters_served, species_stocked in year_rows
+        ]
 
-        recent_limit = max(1, int(recent_limit or 10))
-        recent_stocking_activity = all_stocking_activity[:recent_limit]
+        monthly_summary = [
+            {
+                "month_number": int(event_month),
+                "month": dt_date(2000, int(event_month), 1).strftime("%b"),
+                "total_fish_stocked": int(fish_total or 0),
+                "stocking_events": event_count,
+                "average_fish_per_event": _safe_round(int(fish_total or 0) / event_count, 2),
+            }
+            for event_month, fish_total, event_count in month_rows
+        ]
 
         largest_stocking_event = max(all_stocking_activity, key=lambda x: x["fish_stocked"], default=None)
+        median_fish_per_event = (
+            median(event["fish_stocked"] for event in all_stocking_activity) if all_stocking_activity else None
+        )
 
         summary = {
             "coverage_statement": (
                 f"Total coverage based on {stocking_events} stocking events "
-                f"across {len(unique_waters)} waters."
+                f"across {unique_waters} waters."
             ),
             "total_fish_stocked": total_fish_stocked,
             "stocking_events": stocking_events,
-            "unique_waters_served": len(unique_waters),
-            "unique_species_stocked": len(unique_species),
+            "unique_waters_served": unique_waters,
+            "unique_species_stocked": unique_species,
             "average_fish_weight": _safe_round(average_weight, 2),
-            "average_fish_per_event": _safe_round(average_fish_per_event, 2),
+            "average_fish_per_event": _safe_round(
+                total_fish_stocked / stocking_events if stocking_events else None,
+                2,
+            ),
             "median_fish_per_event": _safe_round(float(median_fish_per_event), 2) if median_fish_per_event is not None else None,
-            "first_recorded_stocking": first_recorded_stocking,
-            "most_recent_stocking": most_recent_stocking,
+            "first_recorded_stocking": _iso(first_date),
+            "most_recent_stocking": _iso(last_date),
             "active_years": active_years,
             "average_events_per_year": _safe_round(
                 stocking_events / active_years if active_years else None,
                 2,
             ),
-            "waters_with_coordinates": len(unique_waters_with_coordinates),
+            "waters_with_coordinates": waters_with_coordinates,
             "derby_stocking_events": derby_stocking_events,
-            "derby_waters_served": len(unique_derby_waters),
+            "derby_waters_served": derby_waters,
             "largest_stocking_event": largest_stocking_event,
         }
 
@@ -483,19 +698,36 @@ class DataBase:
             "species_breakdown": species_breakdown,
             "yearly_totals": yearly_summary,
             "monthly_totals": monthly_summary,
-            "recent_stocking_activity": recent_stocking_activity,
+            # Sliced to recent_limit by get_hatchery_profile.
+            "recent_stocking_activity": all_stocking_activity,
             "all_stocking_activity": all_stocking_activity,
             "geo_bounds": geo_bounds,
         }
 
+    @ttl_cache(READ_CACHE_TTL_SECONDS)
     def get_date_data_updated(self):
-        return self.conn.execute(text("SELECT updated FROM utility ORDER BY id DESC LIMIT 1")).scalar()
+        with self._conn() as conn:
+            return conn.execute(_DATE_UPDATED_SQL).scalar()
+
+    def get_water_locations(self) -> List[Tuple]:
+        """(id, original_html_name, water_name_cleaned, latitude, longitude, directions) for every water location."""
+        with self._conn() as conn:
+            return conn.execute(
+                select(
+                    WaterLocation.id,
+                    WaterLocation.original_html_name,
+                    WaterLocation.water_name_cleaned,
+                    WaterLocation.latitude,
+                    WaterLocation.longitude,
+                    WaterLocation.directions,
+                )
+            ).all()
 
     def get_water_location(self, original_html_name):
-        # match exactly on stored original_html_name (you already normalize in scraper)
+        # case-insensitive match on stored original_html_name; uses ix_wl_original_lower
         return (
             self.session.query(WaterLocation)
-            .filter(WaterLocation.original_html_name.ilike(original_html_name))
+            .filter(func.lower(WaterLocation.original_html_name) == original_html_name.lower())
             .first()
         )
 
@@ -506,10 +738,15 @@ class DataBase:
             Base.metadata.drop_all(self.engine)
             Base.metadata.create_all(self.engine)
 
-        self.write_lake_data(data)
-        self.write_utility_data(utility_meta=utility_meta)
-        self.session.commit()
-        self.session.close()
+        # One short-lived session spans the whole write; remove() discards it
+        # (rolling back if anything failed) so no identity map outlives it.
+        try:
+            self.write_lake_data(data)
+            self.write_utility_data(utility_meta=utility_meta)
+            self.session.commit()
+        finally:
+            self.session.remove()
+        clear_caches()
 
     # -------- Utilities --------
     def record_exists(self, model, **kwargs):
@@ -519,7 +756,7 @@ class DataBase:
 
     def insert_water_location(self, original_html_name, water_name_cleaned, latitude, longitude, directions, derby_participant):
         if self.record_exists(WaterLocation, original_html_name=original_html_name):
-            print(f"Skipping insert — Water location '{original_html_name}' already exists.")
+            logger.debug("Skipping insert; water location %r already exists", original_html_name)
             return
         new_location = WaterLocation(
             original_html_name=original_html_name,
@@ -532,113 +769,161 @@ class DataBase:
         )
         self.session.add(new_location)
         self.session.commit()
-        print(f"✅ Inserted new water location: {original_html_name}")
+        logger.info("Inserted new water location %r", original_html_name)
 
     # -------- Dedup support --------
-    def _preload_existing_report_keys(self) -> Set[Tuple]:
+    def _preload_existing_report_keys(self, data) -> Set[Tuple]:
         """
         Natural key: (date, water_location_id, species, hatchery, stocked_fish)
-        All text normalized to lowercase/trim on load.
+        Text is normalized (lowercase/trim, '' -> NULL) by the database, so the
+        rows come back as ready-made key tuples.
+        Only rows in the incoming batch's date range can collide, so the scan
+        is limited to that window instead of the whole history.
         """
-        rows = self.session.query(
+        dates = [row['date'] for row in data if row.get('date') is not None]
+        date_filter = StockingReport.date.between(min(dates), max(dates)) if dates else false()
+        if len(dates) < len(data):
+            date_filter = or_(date_filter, StockingReport.date.is_(None))
+
+        stmt = select(
             StockingReport.date,
             StockingReport.water_location_id,
-            StockingReport.species,
-            StockingReport.hatchery,
+            func.nullif(func.lower(func.trim(StockingReport.species)), ''),
+            func.nullif(func.lower(func.trim(StockingReport.hatchery)), ''),
             StockingReport.stocked_fish
-        ).all()
+        ).where(date_filter).execution_options(yield_per=10000)
 
-        keys = set()
-        for d, wl_id, sp, hat, cnt in rows:
-            keys.add((d, wl_id, _norm_text(sp), _norm_text(hat), cnt))
-        return keys
+        # Streamed in chunks so only the set itself is held in memory.
+        return set(map(tuple, self.session.execute(stmt)))
 
-    def _insert_stocking_upsert_pg(self, payload: dict, use_constraint: bool = True) -> bool:
+    def _insert_stocking_upsert_pg(self, payloads: List[dict]) -> int:
         """
-        Returns True if a row was inserted, False if it conflicted and did nothing.
+        Multi-row INSERT ... ON CONFLICT DO NOTHING in one round-trip.
+        Returns how many rows were actually inserted.
         """
-        stmt = pg_insert(StockingReport.__table__).values(payload)
+        if not payloads:
+            return 0
+
+        stmt = pg_insert(StockingReport.__table__).values(payloads)
 
         stmt = stmt.on_conflict_do_nothing(
             index_elements=['date', 'species', 'hatchery', 'stocked_fish']
         )
 
-        # Ask Postgres to return the id only when an insert happened
+        # Ask Postgres to return ids only for rows that were inserted
         stmt = stmt.returning(StockingReport.id)
 
         res = self.session.execute(stmt)
-        
-        inserted_pk = res.scalar_one_or_none()
-        return inserted_pk is not None
+        return len(res.fetchall())
+
+    def _insert_water_locations(self, payloads: List[dict]) -> Dict[str, int]:
+        """
+        Multi-row INSERT ... ON CONFLICT (original_html_name) DO NOTHING.
+        Returns ids keyed by normalized original_html_name, including rows
+        another writer inserted first.
+        """
+        if not payloads:
+            return {}
+
+        stmt = (
+            pg_insert(WaterLocation.__table__)
+            .values(payloads)
+            .on_conflict_do_nothing(index_elements=['original_html_name'])
+            .returning(WaterLocation.id, WaterLocation.original_html_name)
+        )
+        rows = self.session.execute(stmt).fetchall()
+
+        inserted = {name for _, name in rows}
+        missing = [p["original_html_name"] for p in payloads if p["original_html_name"] not in inserted]
+        if missing:
+            rows += self.session.execute(
+                select(WaterLocation.id, WaterLocation.original_html_name)
+                .where(WaterLocation.original_html_name.in_(missing))
+            ).fetchall()
+
+        return {(name or "").strip().lower(): wl_id for wl_id, name in rows}
 
     # -------- Main write path --------
     def write_lake_data(self, data):
         # Preload keys already in DB and dedup within this run
-        existing_keys = self._preload_existing_report_keys()
+        existing_keys = self._preload_existing_report_keys(data)
         seen_this_run: Set[Tuple] = set()
 
-        # Simple cache for WLs we resolve during this run
-        wl_cache = {}
+        # Resolve WLs from one preload keyed by normalized original_html_name
+        # instead of an ILIKE lookup per row; ids created this run are added.
+        wl_ids: Dict[str, int] = {
+            name.strip().lower(): wl_id
+            for wl_id, name in self.session.query(WaterLocation.id, WaterLocation.original_html_name)
+            if name
+        }
+        allow_create_wl = os.getenv("SCRAPER_ALLOW_CREATE_WATER_LOCATION", "false").lower() in ("1", "true", "yes")
+
+        # Create missing WLs (only if allowed) up front in one INSERT; the
+        # first row seen for each name supplies its details.
+        new_wl_count = 0
+        if allow_create_wl:
+            new_wls: Dict[str, dict] = {}
+            for lake_data in data:
+                wl_key = (lake_data['original_html_name'] or "").strip().lower()
+                if wl_key not in wl_ids and wl_key not in new_wls:
+                    new_wls[wl_key] = {
+                        "original_html_name": lake_data['original_html_name'],
+                        "water_name_cleaned": lake_data['water_name_cleaned'],
+                        "latitude": lake_data['latitude'],
+                        "longitude": lake_data['longitude'],
+                        "directions": lake_data['directions'],
+                        "created_at": datetime.now(),
+                        "derby_participant": lake_data.get('derby_participant', False),
+                    }
+            wl_ids.update(self._insert_water_locations(list(new_wls.values())))
+            new_wl_count = len(new_wls)
+
+        # Payloads are flushed in chunks rather than one INSERT per row
+        batch: List[dict] = []
+        skipped_duplicates = skipped_no_wl = 0
 
         for lake_data in data:
             original_html_name = lake_data['original_html_name']
-            wl_cache_key = (original_html_name or "").strip().lower()
-
-            water_location = wl_cache.get(wl_cache_key)
-            if not water_location:
-                # avoid autoflush while we query
-                with self.session.no_autoflush:
-                    water_location = self.get_water_location(original_html_name)
-
-            # Create WL only if allowed (scraper decides to include or skip rows without WL)
-            if not water_location and os.getenv("SCRAPER_ALLOW_CREATE_WATER_LOCATION", "false").lower() in ("1", "true", "yes"):
-                water_location = WaterLocation(
-                    original_html_name=original_html_name,
-                    water_name_cleaned=lake_data['water_name_cleaned'],
-                    latitude=lake_data['latitude'],
-                    longitude=lake_data['longitude'],
-                    directions=lake_data['directions'],
-                    created_at=datetime.now(),
-                    derby_participant=lake_data.get('derby_participant', False)
-                )
-                self.session.add(water_location)
-                self.session.flush()  # assign id
+            water_location_id = wl_ids.get((original_html_name or "").strip().lower())
 
-            if not water_location:
+            if water_location_id is None:
                 # If we still don't have a WL, skip this row (prevents orphan/duplicate WLs)
+                skipped_no_wl += 1
                 continue
 
-            wl_cache[wl_cache_key] = water_location
-
             species = lake_data.get('species')
             hatchery = lake_data.get('hatchery')
 
-            # Build natural key
-            nk = (lake_data['date'], water_location.id, species, hatchery, lake_data['stocked_fish'])
+            # Build natural key, normalized like the preloaded keys
+            nk = (lake_data['date'], water_location_id, _key_text(species), _key_text(hatchery), lake_data['stocked_fish'])
 
             # Skip if duplicate in DB or within this run
             if nk in existing_keys or nk in seen_this_run:
-                # print(f"Skip dup: {nk}")
+                skipped_duplicates += 1
                 continue
 
             # Build insert payload
-            payload = {
+            batch.append({
                 "stocked_fish": lake_data['stocked_fish'],
                 "date": lake_data['date'],
                 "weight": lake_data.get('weight'),
                 "species": species,
                 "hatchery": hatchery,
-                "water_location_id": water_location.id,
-            }
+                "water_location_id": water_location_id,
+            })
+            seen_this_run.add(nk)
 
-            inserted = False
-            inserted = self._insert_stocking_upsert_pg(payload, use_constraint=True)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self.insert_counter += self._insert_stocking_upsert_pg(batch)
+                batch = []
 
-            if inserted:
-                self.insert_counter += 1
-                seen_this_run.add(nk)
+        self.insert_counter += self._insert_stocking_upsert_pg(batch)
 
-        print(f'There were {self.insert_counter} entries added to {str(StockingReport.__tablename__)}')
+        logger.info(
+            "There were %d entries added to %s (%d duplicates skipped, %d rows without a water location, "
+            "%d new water locations)",
+            self.insert_counter, StockingReport.__tablename__, skipped_duplicates, skipped_no_wl, new_wl_count,
+        )
 
     def write_utility_data(self, utility_meta=None):
         utility_meta = utility_meta or {}
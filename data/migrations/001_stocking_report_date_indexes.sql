@@ -0,0 +1,13 @@
+-- Indexes for the date-range reads behind /stocked_lakes_data,
+-- /stocked_lakes_data_all_time, /total_stocked_by_date_data and /hatchery_totals.
+-- CONCURRENTLY cannot run inside a transaction: apply with psql (autocommit).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sr_date_desc
+    ON stocking_report (date DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sr_wl_date
+    ON stocking_report (water_location_id, date);
+
+-- Covering index so SUM(stocked_fish) ... GROUP BY hatchery can be index-only.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sr_hatchery_date
+    ON stocking_report (hatchery, date) INCLUDE (stocked_fish);
@@ -0,0 +1,13 @@
+-- Indexes for the hatchery lookups in /hatchery_profile.
+-- CONCURRENTLY cannot run inside a transaction: apply with psql (autocommit).
+
+-- Trigram index so lower(hatchery) LIKE '%...%' (the partial-name match)
+-- does not have to scan the whole table.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sr_hatchery_lower_trgm
+    ON stocking_report USING GIN (lower(hatchery) gin_trgm_ops);
+
+-- Exact lower(hatchery) = ... filter on the resolved hatchery's events.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sr_hatchery_lower
+    ON stocking_report (lower(hatchery));
@@ -0,0 +1,6 @@
+-- Expression index for case-insensitive water location lookups by name
+-- (DataBase.get_water_location).
+-- CONCURRENTLY cannot run inside a transaction: apply with psql (autocommit).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_wl_original_lower
+    ON water_location (lower(original_html_name));
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, Integer, String, Boolean, Date, Float, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Date, Float, TIMESTAMP, ForeignKey, Index, func
 
 # Create a SQLAlchemy base
 Base = declarative_base()
@@ -16,6 +16,10 @@ class WaterLocation(Base):
     created_at = Column(TIMESTAMP)
     derby_participant = Column(Boolean)
 
+    # Case-insensitive lookups by name (get_water_location).
+    __table_args__ = (
+        Index('ix_wl_original_lower', func.lower(original_html_name)),
+    )
 
 
 class StockingReport(Base):
@@ -29,6 +33,15 @@ class StockingReport(Base):
     water_location_id = Column(Integer, ForeignKey('water_location.id'))
     water_location = relationship("WaterLocation")
 
+    # Support the date-range reads in data/database.py. Existing Postgres
+    # databases get these from data/migrations/ (create_all only runs on SQLite).
+    __table_args__ = (
+        Index('idx_sr_date_desc', date.desc()),
+        Index('idx_sr_wl_date', water_location_id, date),
+        Index('idx_sr_hatchery_date', hatchery, date, postgresql_include=['stocked_fish']),
+        Index('idx_sr_hatchery_lower', func.lower(hatchery)),
+    )
+
     # Not currently using this, but is maintained. May be helpful in the future
     def to_dict(self):
         return {
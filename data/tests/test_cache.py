@@ -0,0 +1,105 @@
+from data import cache
+from data.cache import clear_caches, ttl_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingReader:
+    def __init__(self):
+        self.calls = []
+
+    @ttl_cache(60)
+    def read(self, value):
+        self.calls.append(value)
+        return value * 2
+
+    @ttl_cache(60, maxsize=2)
+    def read_small(self, value):
+        self.calls.append(value)
+        return value * 2
+
+
+def test_ttl_cache_returns_cached_value_until_it_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "monotonic", clock)
+    reader = CountingReader()
+    CountingReader.read.cache_clear()
+
+    assert reader.read(1) == 2
+    clock.now += 59
+    assert reader.read(1) == 2
+    assert reader.calls == [1]
+
+    clock.now += 1
+    assert reader.read(1) == 2
+    assert reader.calls == [1, 1]
+
+
+def test_ttl_cache_evicts_oldest_entry_when_full(monkeypatch):
+    monkeypatch.setattr(cache, "monotonic", FakeClock())
+    reader = CountingReader()
+    CountingReader.read_small.cache_clear()
+
+    reader.read_small(1)
+    reader.read_small(2)
+    reader.read_small(3)
+    assert reader.calls == [1, 2, 3]
+
+    reader.read_small(2)
+    reader.read_small(3)
+    assert reader.calls == [1, 2, 3]
+
+    reader.read_small(1)
+    assert reader.calls == [1, 2, 3, 1]
+
+
+def test_ttl_cache_evicts_expired_entries_before_live_ones(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "monotonic", clock)
+    reader = CountingReader()
+    CountingReader.read_small.cache_clear()
+
+    reader.read_small(1)
+    clock.now += 30
+    reader.read_small(2)
+    clock.now += 31  # entry 1 has expired, entry 2 has not
+    reader.read_small(3)
+    reader.read_small(2)
+    assert reader.calls == [1, 2, 3]
+
+
+def test_ttl_cache_uses_custom_key(monkeypatch):
+    monkeypatch.setattr(cache, "monotonic", FakeClock())
+    calls = []
+
+    class Reader:
+        @ttl_cache(60, key=lambda name: (name.strip().lower(),))
+        def read(self, name):
+            calls.append(name)
+            return name
+
+    reader = Reader()
+    assert reader.read("Lake") == "Lake"
+    assert reader.read(" lake ") == "Lake"
+    assert calls == ["Lake"]
+
+
+def test_clear_caches_drops_every_store(monkeypatch):
+    monkeypatch.setattr(cache, "monotonic", FakeClock())
+    reader = CountingReader()
+    CountingReader.read.cache_clear()
+    CountingReader.read_small.cache_clear()
+
+    reader.read(1)
+    reader.read_small(1)
+    clear_caches()
+    reader.read(1)
+    reader.read_small(1)
+
+    assert reader.calls == [1, 1, 1, 1]
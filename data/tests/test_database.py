@@ -0,0 +1,335 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.pool import StaticPool
+
+from data import database
+from data.cache import clear_caches
+from data.database import DataBase
+from data.models import Base, StockingReport, WaterLocation
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "_engine", engine)
+    clear_caches()
+    yield DataBase()
+    clear_caches()
+    engine.dispose()
+
+
+WATER_LOCATIONS = [
+    {"id": 1, "original_html_name": "LAKE A (KING)", "water_name_cleaned": "Lake A",
+     "latitude": 47.0, "longitude": -122.0, "directions": "old dirs", "derby_participant": True},
+    {"id": 2, "original_html_name": "LAKE A #2 (KING)", "water_name_cleaned": "Lake A",
+     "latitude": 47.5, "longitude": -122.5, "directions": "new dirs", "derby_participant": False},
+    {"id": 3, "original_html_name": "POND (KING)", "water_name_cleaned": "",
+     "latitude": None, "longitude": None, "directions": None, "derby_participant": None},
+    {"id": 4, "original_html_name": "CREEK (KING)", "water_name_cleaned": None,
+     "latitude": 46.0, "longitude": -121.0, "directions": "creek dirs", "derby_participant": False},
+]
+
+STOCKING_REPORTS = [
+    {"id": 1, "date": date(2023, 4, 10), "water_location_id": 1, "species": "Rainbow",
+     "stocked_fish": 100, "weight": 2.0, "hatchery": "Army Np"},
+    {"id": 2, "date": date(2024, 5, 1), "water_location_id": 2, "species": "Rainbow",
+     "stocked_fish": 50, "weight": 4.0, "hatchery": "Army Np"},
+    {"id": 3, "date": date(2024, 5, 1), "water_location_id": 3, "species": None,
+     "stocked_fish": None, "weight": None, "hatchery": "Army Np"},
+    {"id": 4, "date": None, "water_location_id": 4, "species": "",
+     "stocked_fish": 30, "weight": None, "hatchery": "Army Np"},
+    {"id": 5, "date": date(2023, 6, 15), "water_location_id": 4, "species": "Cutthroat",
+     "stocked_fish": 20, "weight": 1.0, "hatchery": "Army Np"},
+    {"id": 6, "date": date(2022, 1, 1), "water_location_id": 1, "species": "Rainbow",
+     "stocked_fish": 5, "weight": 1.0, "hatchery": "Army Np Annex"},
+    {"id": 7, "date": date(2024, 1, 1), "water_location_id": 1, "species": "Rainbow",
+     "stocked_fish": 999, "weight": 1.0, "hatchery": None},
+    {"id": 8, "date": date(2024, 1, 1), "water_location_id": 1, "species": "Rainbow",
+     "stocked_fish": 999, "weight": 1.0, "hatchery": ""},
+]
+
+
+@pytest.fixture
+def seeded_db(db):
+    with db.engine.begin() as conn:
+        conn.execute(insert(WaterLocation), WATER_LOCATIONS)
+        conn.execute(insert(StockingReport), STOCKING_REPORTS)
+    return db
+
+
+def test_hatchery_profile_blank_name(db):
+    profile = db.get_hatchery_profile("  ")
+
+    assert profile["match_strategy"] == "none"
+    assert profile["summary"] is None
+    assert profile["geo_bounds"] is None
+
+
+def test_hatchery_profile_no_match(seeded_db):
+    profile = seeded_db.get_hatchery_profile("nowhere")
+
+    assert profile["resolved_hatchery"] is None
+    assert profile["match_count"] == 0
+    assert profile["all_stocking_activity"] == []
+
+
+def test_hatchery_profile_matching(seeded_db):
+    exact = seeded_db.get_hatchery_profile("army np")
+    partial = seeded_db.get_hatchery_profile("annex")
+
+    assert exact["resolved_hatchery"] == "Army Np"
+    assert exact["match_strategy"] == "exact_case_insensitive"
+    assert exact["matches"] == [
+        {"hatchery": "Army Np", "stocking_events": 5, "total_fish_stocked": 200},
+        {"hatchery": "Army Np Annex", "stocking_events": 1, "total_fish_stocked": 5},
+    ]
+    assert partial["resolved_hatchery"] == "Army Np Annex"
+    assert partial["match_strategy"] == "best_partial_by_total_fish"
+
+
+def test_hatchery_profile_events_fill_in_nulls_and_blanks(seeded_db):
+    events = seeded_db.get_hatchery_profile("Army Np")["all_stocking_activity"]
+
+    assert [e["date"] for e in events] == ["2024-05-01", "2024-05-01", "2023-06-15", "2023-04-10", None]
+    assert events[0] == {
+        "date": "2024-05-01",
+        "water_name": "Unknown Water",
+        "species": "Unknown Species",
+        "fish_stocked": 0,
+        "weight": None,
+        "latitude": None,
+        "longitude": None,
+        "directions": None,
+        "derby_participant": False,
+    }
+    assert events[-1]["water_name"] == "Unknown Water"
+    assert events[-1]["species"] == "Unknown Species"
+    assert events[-1]["fish_stocked"] == 30
+
+
+def test_hatchery_profile_summary(seeded_db):
+    profile = seeded_db.get_hatchery_profile("Army Np")
+    summary = profile["summary"]
+
+    assert summary["total_fish_stocked"] == 200
+    assert summary["stocking_events"] == 5
+    assert summary["unique_waters_served"] == 2
+    assert summary["unique_species_stocked"] == 3
+    assert summary["average_fish_weight"] == 2.33
+    assert summary["average_fish_per_event"] == 40.0
+    assert summary["median_fish_per_event"] == 30.0
+    assert summary["first_recorded_stocking"] == "2023-04-10"
+    assert summary["most_recent_stocking"] == "2024-05-01"
+    assert summary["active_years"] == 2
+    assert summary["average_events_per_year"] == 2.5
+    assert summary["waters_with_coordinates"] == 2
+    assert summary["derby_stocking_events"] == 1
+    assert summary["derby_waters_served"] == 1
+    assert summary["largest_stocking_event"]["fish_stocked"] == 100
+    assert summary["largest_stocking_event"]["date"] == "2023-04-10"
+
+
+def test_hatchery_profile_top_waters_use_latest_location(seeded_db):
+    top_waters = seeded_db.get_hatchery_profile("Army Np")["top_waters"]
+
+    assert top_waters == [
+        {
+            "water_name": "Lake A",
+            "total_fish_stocked": 150,
+            "stocking_events": 2,
+            "first_stocking_date": "2023-04-10",
+            "most_recent_stocking_date": "2024-05-01",
+            "species": ["Rainbow"],
+            "latitude": 47.5,
+            "longitude": -122.5,
+            "directions": "new dirs",
+            "derby_participant": False,
+            "share_of_total_fish_pct": 75.0,
+        },
+        {
+            "water_name": "Unknown Water",
+            "total_fish_stocked": 50,
+            "stocking_events": 3,
+            "first_stocking_date": "2023-06-15",
+            "most_recent_stocking_date": "2024-05-01",
+            "species": ["Cutthroat", "Unknown Species"],
+            "latitude": None,
+            "longitude": None,
+            "directions": None,
+            "derby_participant": False,
+            "share_of_total_fish_pct": 25.0,
+        },
+    ]
+
+
+def test_hatchery_profile_breakdowns(seeded_db):
+    profile = seeded_db.get_hatchery_profile("Army Np")
+
+    assert [(s["species"], s["total_fish_stocked"], s["stocking_events"], s["average_weight"])
+            for s in profile["species_breakdown"]] == [
+        ("Rainbow", 150, 2, 3.0),
+        ("Unknown Species", 30, 2, None),
+        ("Cutthroat", 20, 1, 1.0),
+    ]
+    assert profile["yearly_totals"] == [
+        {"year": 2023, "total_fish_stocked": 120, "stocking_events": 2, "unique_waters_served": 2,
+         "unique_species_stocked": 2, "average_fish_per_event": 60.0},
+        {"year": 2024, "total_fish_stocked": 50, "stocking_events": 2, "unique_waters_served": 2,
+         "unique_species_stocked": 2, "average_fish_per_event": 25.0},
+    ]
+    assert [(m["month"], m["total_fish_stocked"], m["stocking_events"]) for m in profile["monthly_totals"]] == [
+        ("Apr", 100, 1),
+        ("May", 50, 2),
+        ("Jun", 20, 1),
+    ]
+
+
+def test_hatchery_profile_geo_bounds(seeded_db):
+    assert seeded_db.get_hatchery_profile("Army Np")["geo_bounds"] == {
+        "min_latitude": 46.0,
+        "max_latitude": 47.5,
+        "min_longitude": -122.5,
+        "max_longitude": -121.0,
+        "center_latitude": 46.833333,
+        "center_longitude": -121.833333,
+    }
+
+
+def test_hatchery_profile_limits(seeded_db):
+    events = seeded_db.get_hatchery_profile("Army Np")["all_stocking_activity"]
+
+    assert seeded_db.get_hatchery_profile("Army Np", recent_limit=2)["recent_stocking_activity"] == events[:2]
+    assert seeded_db.get_hatchery_profile("Army Np", recent_limit=-5)["recent_stocking_activity"] == events[:1]
+    assert len(seeded_db.get_hatchery_profile("Army Np", recent_limit=0)["recent_stocking_activity"]) == 5
+
+    top_waters = seeded_db.get_hatchery_profile("Army Np", top_waters_limit=1)["top_waters"]
+    assert [w["water_name"] for w in top_waters] == ["Lake A"]
+
+
+def _lake_row(name, day, species="Rainbow", hatchery="Army Np", fish=100):
+    return {
+        "original_html_name": name,
+        "water_name_cleaned": name.strip().title(),
+        "latitude": 47.0,
+        "longitude": -122.0,
+        "directions": None,
+        "derby_participant": False,
+        "date": day,
+        "species": species,
+        "hatchery": hatchery,
+        "stocked_fish": fish,
+        "weight": 2.0,
+    }
+
+
+@pytest.fixture
+def write_db(db, monkeypatch):
+    # Postgres has a unique constraint matching the ON CONFLICT target of
+    # _insert_stocking_upsert_pg; the model doesn't declare it.
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX uq_sr_natural ON stocking_report (date, species, hatchery, stocked_fish)"
+        )
+        conn.execute(insert(WaterLocation), WATER_LOCATIONS[:1])
+        conn.execute(insert(StockingReport), [
+            {"date": date(2024, 5, 1), "water_location_id": 1, "species": "RAINBOW",
+             "stocked_fish": 100, "weight": 2.0, "hatchery": "army np"},
+        ])
+    monkeypatch.setenv("SCRAPER_ALLOW_CREATE_WATER_LOCATION", "true")
+    return db
+
+
+def _table_rows(db, model):
+    with db.engine.connect() as conn:
+        return conn.execute(select(model)).all()
+
+
+def test_write_lake_data_dedups_normalized_keys(write_db):
+    data = [
+        # Same as the seeded report once names and text are normalized.
+        _lake_row(" lake a (king) ", date(2024, 5, 1), species=" rainbow ", hatchery="Army Np"),
+        # New report for an existing water, sent twice with different casing.
+        _lake_row("LAKE A (KING)", date(2024, 5, 2)),
+        _lake_row("Lake A (King)", date(2024, 5, 2), species="RAINBOW ", hatchery=" army NP"),
+        # New water, seen under two spellings.
+        _lake_row("NEW POND (KING)", date(2024, 5, 2), fish=50),
+        _lake_row(" new pond (king)", date(2024, 5, 3), fish=50),
+    ]
+
+    write_db.write_data(data)
+
+    assert write_db.insert_counter == 3
+    water_names = sorted(row.original_html_name for row in _table_rows(write_db, WaterLocation))
+    assert water_names == ["LAKE A (KING)", "NEW POND (KING)"]
+    assert len(_table_rows(write_db, StockingReport)) == 4
+
+    rerun = DataBase()
+    rerun.write_data(data)
+
+    assert rerun.insert_counter == 0
+    assert len(_table_rows(write_db, WaterLocation)) == 2
+    assert len(_table_rows(write_db, StockingReport)) == 4
+
+
+def test_write_lake_data_skips_unknown_waters_unless_allowed(write_db, monkeypatch):
+    monkeypatch.setenv("SCRAPER_ALLOW_CREATE_WATER_LOCATION", "false")
+
+    write_db.write_data([_lake_row("NEW POND (KING)", date(2024, 5, 2))])
+
+    assert write_db.insert_counter == 0
+    assert len(_table_rows(write_db, WaterLocation)) == 1
+
+
+def test_insert_water_locations_returns_existing_ids(write_db):
+    created_at = datetime(2024, 5, 1)
+    payloads = [
+        {"original_html_name": "LAKE A (KING)", "water_name_cleaned": "Lake A", "latitude": None,
+         "longitude": None, "directions": None, "created_at": created_at, "derby_participant": False},
+        {"original_html_name": "NEW POND (KING)", "water_name_cleaned": "New Pond", "latitude": None,
+         "longitude": None, "directions": None, "created_at": created_at, "derby_participant": False},
+    ]
+
+    ids = write_db._insert_water_locations(payloads)
+    write_db.session.commit()
+
+    assert ids["lake a (king)"] == 1
+    assert set(ids) == {"lake a (king)", "new pond (king)"}
+    assert len(_table_rows(write_db, WaterLocation)) == 2
+
+
+def test_preload_existing_report_keys_is_bounded_by_batch_dates(write_db):
+    with write_db.engine.begin() as conn:
+        conn.execute(insert(StockingReport), [
+            {"date": date(2024, 4, 1), "water_location_id": 1, "species": "Rainbow",
+             "stocked_fish": 10, "weight": 1.0, "hatchery": "Army Np"},
+            {"date": None, "water_location_id": 1, "species": " ", "stocked_fish": 10,
+             "weight": 1.0, "hatchery": None},
+        ])
+
+    keys = write_db._preload_existing_report_keys([{"date": date(2024, 5, 1)}])
+    with_null_dates = write_db._preload_existing_report_keys([{"date": date(2024, 5, 1)}, {"date": None}])
+
+    assert keys == {(date(2024, 5, 1), 1, "rainbow", "army np", 100)}
+    assert with_null_dates == keys | {(None, 1, None, None, 10)}
+    assert write_db._preload_existing_report_keys([]) == set()
+
+
+def test_hatchery_profile_limits_share_one_cached_profile(seeded_db):
+    statements = []
+    event.listen(seeded_db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    first = seeded_db.get_hatchery_profile("Army Np", recent_limit=2)
+    queries_per_profile = len(statements)
+    seeded_db.get_hatchery_profile(" Army Np ", recent_limit=3, top_waters_limit=1)
+    seeded_db.get_hatchery_profile("Army Np", recent_limit=100)
+
+    assert len(statements) == queries_per_profile
+    assert len(first["recent_stocking_activity"]) == 2
+    assert len(first["top_waters"]) == 2
@@ -3,21 +3,24 @@
 
 import os
 import logging
-from dataclasses import dataclass, asdict
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, date
 from time import time
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, Iterable, List, Dict, Tuple
 from urllib.parse import quote_plus
 import re
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from geopy import GoogleV3
 from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
 
 # project imports
 from data.database import DataBase
-from data.models import WaterLocation  # used for preloading the cache
 
 # ---------------- Logging ----------------
 logging.basicConfig(
@@ -47,7 +50,12 @@ class RowRecord:
     directions: Optional[str] = None
     derby_participant: bool = False
 
+# The WaterLocation columns the scraper reads; plain tuples, no ORM state.
+WLRow = namedtuple("WLRow", "id original_html_name water_name_cleaned latitude longitude directions")
+
 # ---------- Legacy cleaning (matches your original) ----------
+# The cleaning/normalization/date helpers below are pure and see the same
+# few dozen lake names and dates over and over, so they are memoized.
 ABBREVIATIONS = {
     "LK": "Lake", "PD": "Pond", "CR": "Creek", "PRK": "Park", "CO": "County",
     "ADLT": "Adult", "JV": "Juvenile"
@@ -57,17 +65,15 @@ _ABBR_REGEX = re.compile(
     r"\(.*?\)|[^\w\s\d]|(?<!\w)(\d+)(?!\w)|\b(" + "|".join(ABBREVIATIONS.keys()) + r")\b"
 )
 
+def _abbr_repl(m: re.Match) -> str:
+    # Only the ABBR alternative (group 2) has a replacement; parens, punct
+    # and standalone numbers are dropped.
+    return ABBREVIATIONS.get(m[2], "")
+
+@lru_cache(maxsize=4096)
 def legacy_clean_water_name(cell_text: str) -> str:
     raw = (cell_text or "").strip() + " County"
-
-    def _repl(m: re.Match) -> str:
-        if m.group(1):  # standalone numbers
-            return ""
-        if m.group(2):  # ABBR key
-            return ABBREVIATIONS.get(m.group(2), "")
-        return ""  # parens/punct -> drop
-
-    s = _ABBR_REGEX.sub(_repl, raw)
+    s = _ABBR_REGEX.sub(_abbr_repl, raw)
     s = s.strip().replace("\n", "").replace(" Region ", "").replace("  ", " ")
     s = s.title()
     return s
@@ -81,6 +87,7 @@ def norm_key_exact(s: Optional[str]) -> Optional[str]:
         return None
     return s.strip()
 
+@lru_cache(maxsize=4096)
 def norm_key_relaxed(s: Optional[str]) -> Optional[str]:
     """Collapse whitespace & casefold; keep letters/digits/spaces."""
     if not s:
@@ -88,6 +95,7 @@ def norm_key_relaxed(s: Optional[str]) -> Optional[str]:
     s2 = _whitespace.sub(" ", s).strip().casefold()
     return s2
 
+@lru_cache(maxsize=4096)
 def norm_key_alnum(s: Optional[str]) -> Optional[str]:
     """Only letters/digits for last-resort match."""
     if not s:
@@ -95,6 +103,17 @@ def norm_key_alnum(s: Optional[str]) -> Optional[str]:
     s2 = _nonword.sub("", s).casefold()
     return s2
 
+def wl_index_keys(original_html_name: Optional[str], cleaned: Optional[str]) -> List[str]:
+    """Prefixed WaterLocation index keys, in match priority order."""
+    keys = (
+        ("e", norm_key_exact(original_html_name)),
+        ("r", norm_key_relaxed(original_html_name)),
+        ("a", norm_key_alnum(original_html_name)),
+        ("cr", norm_key_relaxed(cleaned)),
+        ("ca", norm_key_alnum(cleaned)),
+    )
+    return [f"{prefix}:{key}" for prefix, key in keys if key]
+
 def parse_int(text: Optional[str]) -> Optional[int]:
     if not text:
         return None
@@ -113,6 +132,7 @@ def parse_float(text: Optional[str]) -> Optional[float]:
         logging.debug("parse_float failed for %r", text)
         return None
 
+@lru_cache(maxsize=4096)
 def parse_date_str(text: Optional[str]) -> Optional[date]:
     if not text:
         return None
@@ -141,6 +161,7 @@ class Scraper:
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/134.0.0.0 Safari/537.36"
     )
+    GEOCODE_WORKERS = 8
 
     def __init__(self, db: Optional[DataBase] = None):
         self.db = db
@@ -148,14 +169,14 @@ class Scraper:
         # behavior flags
         self.allow_create_wl = os.getenv("SCRAPER_ALLOW_CREATE_WATER_LOCATION", "false").lower() in ("1", "true", "yes")
         self.do_geocode = os.getenv("SCRAPER_GEOCODE", "false").lower() in ("1", "true", "yes")
+        # one geocoder (and its HTTP connection pool) shared by every lookup
+        api_key = os.getenv("GV3_API_KEY")
+        self._geocoder = GoogleV3(api_key=api_key, timeout=10) if (self.do_geocode and api_key) else None
 
-        # preload existing WaterLocation rows into multiple lookup maps
+        # preload existing WaterLocation rows into one index; each row is
+        # stored under several prefixed keys (see wl_index_keys)
         self._existing_maps_built = False
-        self.by_original_exact: Dict[str, WaterLocation] = {}
-        self.by_original_relaxed: Dict[str, WaterLocation] = {}
-        self.by_original_alnum: Dict[str, WaterLocation] = {}
-        self.by_clean_relaxed: Dict[str, WaterLocation] = {}
-        self.by_clean_alnum: Dict[str, WaterLocation] = {}
+        self.wl_index: Dict[str, WLRow] = {}
 
     @classmethod
     def _browser_headers(cls) -> Dict[str, str]:
@@ -197,43 +218,28 @@ class Scraper:
         if self._existing_maps_built or not self.db:
             return
         logging.info("Preloading existing WaterLocation index...")
-        q = self.db.session.query(WaterLocation).all()
+        # Read on a short-lived connection, so no session transaction stays
+        # open through the page fetch and geocoding.
+        q = [WLRow(*row) for row in self.db.get_water_locations()]
         for wl in q:
-            o = wl.original_html_name or ""
-            c = wl.water_name_cleaned or ""
-
-            k1 = norm_key_exact(o)
-            k2 = norm_key_relaxed(o)
-            k3 = norm_key_alnum(o)
-            k4 = norm_key_relaxed(c)
-            k5 = norm_key_alnum(c)
-
-            if k1: self.by_original_exact.setdefault(k1, wl)
-            if k2: self.by_original_relaxed.setdefault(k2, wl)
-            if k3: self.by_original_alnum.setdefault(k3, wl)
-            if k4: self.by_clean_relaxed.setdefault(k4, wl)
-            if k5: self.by_clean_alnum.setdefault(k5, wl)
+            for key in wl_index_keys(wl.original_html_name, wl.water_name_cleaned):
+                self.wl_index.setdefault(key, wl)
 
         self._existing_maps_built = True
         logging.info("Indexed %d WaterLocation rows", len(q))
 
-    def _find_existing_wl(self, original_html_name: Optional[str], cleaned: Optional[str]) -> Optional[WaterLocation]:
+    def _find_existing_wl(self, original_html_name: Optional[str], cleaned: Optional[str]) -> Optional[WLRow]:
         """Try multiple keys to hit existing WaterLocation and avoid duplicates."""
         if not self._existing_maps_built:
             self._build_existing_maps()
 
-        for key, mapping in (
-            (norm_key_exact(original_html_name), self.by_original_exact),
-            (norm_key_relaxed(original_html_name), self.by_original_relaxed),
-            (norm_key_alnum(original_html_name), self.by_original_alnum),
-            (norm_key_relaxed(cleaned), self.by_clean_relaxed),
-            (norm_key_alnum(cleaned), self.by_clean_alnum),
-        ):
-            if key and key in mapping:
-                return mapping[key]
+        for key in wl_index_keys(original_html_name, cleaned):
+            wl = self.wl_index.get(key)
+            if wl is not None:
+                return wl
         return None
 
-    def fetch(self, url: str) -> BeautifulSoup:
+    def fetch(self, url: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
         logging.info("Fetching %s", url)
         r = self.session.get(url, timeout=20)
         if r.status_code == 403:
@@ -245,14 +251,21 @@ class Scraper:
                 )
                 r = self.session.get(url, timeout=20, headers=fallback_headers)
         r.raise_for_status()
-        return BeautifulSoup(r.content, "html.parser")
+        return BeautifulSoup(r.content, "lxml", parse_only=parse_only)
 
     def _parse_row(self, tr: Tag) -> Optional[RowRecord]:
-        def txt(sel: str) -> Optional[str]:
-            el = tr.select_one(sel)
+        # Index the row's classed elements in one walk (first match per class,
+        # like select_one) instead of running a CSS selector per field.
+        cells: Dict[str, Tag] = {}
+        for el in tr.find_all(class_=True):
+            for cls in el["class"]:
+                cells.setdefault(cls, el)
+
+        def txt(field: str) -> Optional[str]:
+            el = cells.get(field)
             return (el.get_text(strip=True) if el else None) or None
 
-        lake_td = tr.select_one(".views-field-lake-stocked")
+        lake_td = cells.get("views-field-lake-stocked")
         if not lake_td:
             return None
 
@@ -270,15 +283,15 @@ class Scraper:
         lake_cell_text_raw = lake_td.get_text()  # raw (with newlines) for legacy behavior
         cleaned = legacy_clean_water_name(lake_cell_text_raw)
 
-        date_str   = txt(".views-field-stock-date")
+        date_str   = txt("views-field-stock-date")
         # inside your row parse
-        species_raw  = txt(".views-field-species")
+        species_raw  = txt("views-field-species")
         species      = species_raw.title().strip() if species_raw else None
-        num_str    = txt(".views-field-num-fish")
-        fpl_str    = txt(".views-field-fish-per-lb")
-        hatchery_raw = txt(".views-field-hatchery")
+        num_str    = txt("views-field-num-fish")
+        fpl_str    = txt("views-field-fish-per-lb")
+        hatchery_raw = txt("views-field-hatchery")
         hatchery = hatchery_raw.title() if hatchery_raw else None
-        notes      = txt(".views-field-other-notes")
+        notes      = txt("views-field-other-notes")
 
         stocked = parse_int(num_str)
         fpl     = parse_float(fpl_str)
@@ -301,21 +314,27 @@ class Scraper:
         )
 
     def _geocode_one(self, query: str) -> Tuple[Optional[float], Optional[float]]:
-        from geopy import GoogleV3
-        api_key = os.getenv("GV3_API_KEY")
-        if not api_key:
+        if self._geocoder is None:
             return (None, None)
-        locator = GoogleV3(api_key=api_key)
         try:
-            place = locator.geocode(query, timeout=10)
+            place = self._geocoder.geocode(query)
             if place and place.point:
                 return (float(place.point[0]), float(place.point[1]))
         except Exception as e:
             logging.warning("Geocode error for %s: %s", query, e)
         return (None, None)
 
+    def _geocode_many(self, queries: Iterable[str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """Geocode distinct queries in parallel; each is an independent HTTPS call."""
+        queries = list(queries)
+        if not queries:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.GEOCODE_WORKERS, len(queries))) as pool:
+            return dict(zip(queries, pool.map(self._geocode_one, queries)))
+
     def scrape(self, url: Optional[str] = None) -> List[RowRecord]:
-        soup = self.fetch(url or self.DEFAULT_URL)
+        # Only the report table is needed; skip building the rest of the page.
+        soup = self.fetch(url or self.DEFAULT_URL, parse_only=SoupStrainer("table"))
         trs = soup.select("table.cols-7 tbody tr")
         out: List[RowRecord] = []
         for tr in trs:
@@ -341,6 +360,9 @@ def main():
     matched_existing = 0
     created_new = 0
 
+    kept: List[RowRecord] = []
+    to_geocode: Dict[str, List[RowRecord]] = {}
+
     for r in rows:
         existing = scraper._find_existing_wl(r.original_html_name, r.water_name_cleaned)
 
@@ -353,26 +375,32 @@ def main():
             if scraper.allow_create_wl:
                 if scraper.do_geocode:
                     q = r.directions.split("query=", 1)[-1] if r.directions else quote_plus((r.water_name_cleaned or "") + " Washington State")
-                    lat, lon = scraper._geocode_one(q)
-                    r.latitude, r.longitude = lat, lon
+                    to_geocode.setdefault(q, []).append(r)
                 created_new += 1
             else:
                 created_blocked += 1
                 continue  # skip to avoid creating phantom WLs
 
-        d = asdict(r)
+        kept.append(r)
+
+    # Geocode each distinct new lake once, concurrently
+    for q, (lat, lon) in scraper._geocode_many(to_geocode).items():
+        for r in to_geocode[q]:
+            r.latitude, r.longitude = lat, lon
+
+    for r in kept:
         payload.append({
-            "original_html_name": d["original_html_name"],
-            "water_name_cleaned": d["water_name_cleaned"],
-            "stocked_fish": d["stocked_fish"],
-            "date": d["date"],
-            "species": d["species"],
-            "weight": d["weight"],            # fish-per-lb
-            "hatchery": d["hatchery"],
-            "latitude": d["latitude"],
-            "longitude": d["longitude"],
-            "directions": d["directions"],
-            "derby_participant": d["derby_participant"],
+            "original_html_name": r.original_html_name,
+            "water_name_cleaned": r.water_name_cleaned,
+            "stocked_fish": r.stocked_fish,
+            "date": r.date,
+            "species": r.species,
+            "weight": r.weight,            # fish-per-lb
+            "hatchery": r.hatchery,
+            "latitude": r.latitude,
+            "longitude": r.longitude,
+            "directions": r.directions,
+            "derby_participant": r.derby_participant,
         })
 
     logging.info("Matched existing WL: %d | New WL allowed: %d | New WL blocked: %d",
@@ -1,11 +1,12 @@
 import os
+from datetime import date
 
 import pytest
 import requests
 from dotenv import load_dotenv
 from geopy import GoogleV3
 
-from web_scraper.scraper import Scraper
+from web_scraper.scraper import Scraper, WLRow
 
 
 class DummyResponse:
@@ -49,6 +50,64 @@ def test_fetch_retries_with_browser_headers_after_403(monkeypatch):
     assert calls[1]["headers"]["Accept-Language"] == "en-US,en;q=0.9"
 
 
+STOCKING_PAGE = b"""
+<html><body><table class="views-table cols-7"><tbody>
+<tr>
+<td class="views-field views-field-lake-stocked">
+<a href="/lakes/blue">BLUE LK (COLUMBIA CO)</a><br>
+<a href="/county">Columbia County</a> - <a href="/region">Region 1</a>
+</td>
+<td class="views-field views-field-stock-date">Jan 2, 2024</td>
+<td class="views-field views-field-species">RAINBOW</td>
+<td class="views-field views-field-num-fish">1,500</td>
+<td class="views-field views-field-fish-per-lb">2.50</td>
+<td class="views-field views-field-hatchery">TUCANNON HATCHERY</td>
+<td class="views-field views-field-other-notes"></td>
+</tr>
+<tr><td>no lake cell</td></tr>
+</tbody></table></body></html>
+"""
+
+
+def test_scrape_parses_stocking_rows(monkeypatch):
+    scraper = Scraper()
+    monkeypatch.setattr(scraper.session, "get", lambda url, timeout: DummyResponse(200, STOCKING_PAGE))
+
+    rows = scraper.scrape("https://example.com/trout")
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row.original_html_name == "BLUE LK (COLUMBIA CO)"
+    assert row.county == "Columbia County"
+    assert row.region == "1"
+    assert row.date == date(2024, 1, 2)
+    assert row.species == "Rainbow"
+    assert row.stocked_fish == 1500
+    assert row.weight == 2.5
+    assert row.hatchery == "Tucannon Hatchery"
+    assert row.notes is None
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_water_locations(self):
+        return self.rows
+
+
+def test_find_existing_wl_prefers_original_name_over_cleaned_name():
+    by_original = WLRow(1, "Blue Lk (Columbia Co)", "Blue Lake Columbia County", 46.2, -117.8, None)
+    by_cleaned = WLRow(2, "Other", "Blue Lk (Columbia Co)", None, None, None)
+    scraper = Scraper(db=FakeDB([by_cleaned, by_original]))
+
+    assert scraper._find_existing_wl("Blue Lk (Columbia Co)", None) == by_original
+    assert scraper._find_existing_wl("  blue   lk (columbia co) ", None) == by_original
+    assert scraper._find_existing_wl("unknown", "Blue Lake Columbia County") == by_original
+    assert scraper._find_existing_wl("unknown", "BlueLakeColumbiaCounty") == by_original
+    assert scraper._find_existing_wl("unknown", None) is None
+
+
 @pytest.mark.skipif(not os.getenv("GV3_API_KEY"), reason="GV3_API_KEY is not configured")
 def test_geocoder():
     load_dotenv()